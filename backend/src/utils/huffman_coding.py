@@ -1,11 +1,108 @@
+import array
 import heapq
+import mmap
+import multiprocessing
+import numpy as np
 import pickle
 import os
+import struct
+import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, Any
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to pure Python
+    njit = None
+
+# Width of the one-level decode lookup table (2**11 entries fits in L1)
+DECODE_TABLE_BITS = 11
+
+# Container layout: magic, original size, padding bits, then the 256
+# canonical code lengths and the packed bitstream
+_MAGIC = b'HUF1'
+_HEADER = struct.Struct('<4sQB')
+
+# Inputs above _BLOCK_FORMAT_MIN are stored as independent fixed-size
+# blocks so compression and decompression can run per block in parallel
+# processes. Block container layout: magic, original size, block count,
+# then per block a (payload_len, raw_len, padding) entry, 256 code
+# lengths and the block's packed bitstream
+_BLOCK_SIZE = 256 * 1024
+_BLOCK_FORMAT_MIN = 4 * _BLOCK_SIZE
+_BLOCK_MAGIC = b'HUFB'
+_BLOCK_HEADER = struct.Struct('<4sQI')
+_BLOCK_ENTRY = struct.Struct('<IIB')
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _decode_numba(data, table, table_bits, effective_bits, out):
+        """Decode the bitstream through the lookup table as native code.
+
+        Writes symbols into the preallocated out array and returns how many
+        were produced. Only used when every code fits the table width.
+        """
+        n = data.shape[0]
+        capacity = out.shape[0]
+        mask = (1 << table_bits) - 1
+        buf = 0
+        nbits = 0
+        pos = 0
+        bits_left = effective_bits
+        i = 0
+        
+        while bits_left > 0 and i < capacity:
+            while nbits < table_bits and pos < n:
+                buf = (buf << 8) | np.int64(data[pos])
+                pos += 1
+                nbits += 8
+            
+            peek = ((buf << table_bits) >> nbits) & mask
+            
+            entry = np.int64(table[peek])
+            length = entry & 0xFFFF
+            if length == 0 or length > bits_left:
+                break
+            out[i] = np.uint8(entry >> 16)
+            i += 1
+            nbits -= length
+            bits_left -= length
+
+        return i
+
+    @njit(cache=True, boundscheck=False)
+    def _pack_bits_numba(data, code_table, len_table, out):
+        """Shift each byte's code into an accumulator and emit whole bytes.
+
+        Writes the packed stream into the preallocated out array and
+        returns how many bytes were produced (the final byte is
+        zero-padded to the boundary).
+        """
+        buf = np.int64(0)
+        nbits = 0
+        pos = 0
+
+        for i in range(data.shape[0]):
+            byte = data[i]
+            length = len_table[byte]
+            buf = (buf << length) | code_table[byte]
+            nbits += length
+            while nbits >= 8:
+                nbits -= 8
+                out[pos] = np.uint8((buf >> nbits) & 0xFF)
+                pos += 1
+                buf &= (np.int64(1) << nbits) - 1
+
+        if nbits > 0:
+            out[pos] = np.uint8((buf << (8 - nbits)) & 0xFF)
+            pos += 1
+
+        return pos
+
 class HuffmanNode:
-    """Node class for Huffman tree construction"""
+    """Node class kept for unpickling archives that serialized the tree"""
     def __init__(self, char: str = None, freq: int = 0, left=None, right=None):
         self.char = char
         self.freq = freq
@@ -40,130 +137,374 @@ class HuffmanCompressor:
     
     def __init__(self):
         self.codes = {}
-        self.reverse_codes = {}
         self.root = None
     
-    def _build_frequency_table(self, data: bytes) -> Dict[int, int]:
-        """Build frequency table for bytes in data"""
-        return Counter(data)
+    def _build_frequency_table(self, data: bytes) -> np.ndarray:
+        """Build the 256-entry byte frequency table in one C call"""
+        return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
     
-    def _build_huffman_tree(self, freq_table: Dict[int, int]) -> HuffmanNode:
-        """Build Huffman tree using priority queue (min-heap)"""
-        if not freq_table:
+    def _build_huffman_tree(self, freq_table: np.ndarray):
+        """
+        Build Huffman tree using priority queue (min-heap)
+        
+        The tree is stored as three parallel arrays (left, right, sym)
+        indexed by node number instead of one Python object per node, so
+        traversal is index arithmetic rather than attribute lookups.
+        
+        Returns:
+            Tuple of (left, right, sym, root_index), or None for no input
+        """
+        if freq_table is None:
             return None
         
-        # Create leaf nodes and add to priority queue
-        heap = []
-        for byte_val, freq in freq_table.items():
-            node = HuffmanNode(char=byte_val, freq=freq)
-            heapq.heappush(heap, node)
+        left = array.array('i')
+        right = array.array('i')
+        sym = array.array('i')
+        
+        def new_node(symbol: int) -> int:
+            left.append(-1)
+            right.append(-1)
+            sym.append(symbol)
+            return len(sym) - 1
+        
+        # Create all leaf nodes first and heapify once (O(n), versus
+        # n log n for per-symbol pushes); the node index breaks frequency
+        # ties so tuples never compare beyond it
+        heap = [
+            (int(freq_table[byte_val]), new_node(int(byte_val)))
+            for byte_val in np.nonzero(freq_table)[0]
+        ]
+        heapq.heapify(heap)
+        
+        if not heap:
+            return None
         
         # Handle single character case
         if len(heap) == 1:
-            root = HuffmanNode(freq=heap[0].freq)
-            root.left = heapq.heappop(heap)
-            return root
+            _, node = heapq.heappop(heap)
+            root = new_node(-1)
+            left[root] = node
+            return (left, right, sym, root)
         
         # Build tree by combining nodes
         while len(heap) > 1:
-            left = heapq.heappop(heap)
-            right = heapq.heappop(heap)
+            freq_a, node_a = heapq.heappop(heap)
+            freq_b, node_b = heapq.heappop(heap)
             
-            merged = HuffmanNode(freq=left.freq + right.freq)
-            merged.left = left
-            merged.right = right
+            merged = new_node(-1)
+            left[merged] = node_a
+            right[merged] = node_b
             
-            heapq.heappush(heap, merged)
+            heapq.heappush(heap, (freq_a + freq_b, merged))
+        
+        return (left, right, sym, heap[0][1])
+    
+    def _generate_codes(self, tree) -> Dict[int, tuple]:
+        """
+        Generate Huffman codes from the array-form tree
+        
+        Iterative stack walk that yields (code_int, code_len) pairs
+        directly — no recursion depth to worry about and no per-edge
+        string concatenation.
+        """
+        codes = {}
+        if tree is None:
+            return codes
         
-        return heap[0]
+        left, right, sym, root = tree
+        stack = [(root, 0, 0)]
+        
+        while stack:
+            node, code, length = stack.pop()
+            if sym[node] != -1:
+                # Leaf; a single-symbol tree still gets a 1-bit code
+                codes[sym[node]] = (code, length) if length else (0, 1)
+            else:
+                # Traverse tree: left = 0, right = 1
+                if left[node] != -1:
+                    stack.append((left[node], code << 1, length + 1))
+                if right[node] != -1:
+                    stack.append((right[node], (code << 1) | 1, length + 1))
+        
+        return codes
     
-    def _generate_codes(self, root: HuffmanNode, code: str = "", codes: Dict[int, str] = None) -> Dict[int, str]:
-        """Generate Huffman codes by traversing the tree"""
+    def _codes_from_node_tree(self, root: HuffmanNode, code: int = 0, length: int = 0,
+                              codes: Dict[int, tuple] = None) -> Dict[int, tuple]:
+        """Generate (code_int, code_len) pairs from a legacy HuffmanNode tree"""
         if codes is None:
             codes = {}
         
         if root:
-            # Leaf node - store the code
             if root.char is not None:
-                codes[root.char] = code if code else "0"  # Handle single char case
+                codes[root.char] = (code, length) if length else (0, 1)
             else:
-                # Traverse tree: left = 0, right = 1
-                self._generate_codes(root.left, code + "0", codes)
-                self._generate_codes(root.right, code + "1", codes)
+                self._codes_from_node_tree(root.left, code << 1, length + 1, codes)
+                self._codes_from_node_tree(root.right, (code << 1) | 1, length + 1, codes)
         
         return codes
     
-    def compress(self, input_file: str, output_file: str) -> Dict[str, Any]:
+    def _code_lengths(self, codes: Dict[int, tuple]) -> bytes:
+        """Collect the code length for every byte value (0 = unused)."""
+        lengths = bytearray(256)
+        for symbol, (_, length) in codes.items():
+            lengths[symbol] = length
+        return bytes(lengths)
+    
+    def _limit_code_lengths(self, freq_table: np.ndarray, max_length: int) -> bytes:
+        """
+        Recompute code lengths bounded by max_length (package-merge)
+        
+        Unbounded Huffman lengths can exceed the decode-table width on very
+        skewed inputs, forcing the slow long-code fallback. Package-merge
+        finds the optimal code subject to the length bound; each leaf's
+        final length is the number of first-level packages it appears in.
+        The ratio cost versus unbounded Huffman is a few bits per file.
+        """
+        active = np.nonzero(freq_table)[0]
+        n = len(active)
+        lengths = bytearray(256)
+        
+        if n == 1:
+            lengths[int(active[0])] = 1
+            return bytes(lengths)
+        
+        leaves = sorted((int(freq_table[b]), (int(b),)) for b in active)
+        
+        level = []
+        for _ in range(max_length):
+            packages = [
+                (level[k][0] + level[k + 1][0], level[k][1] + level[k + 1][1])
+                for k in range(0, len(level) - 1, 2)
+            ]
+            level = sorted(packages + leaves)
+        
+        for _, members in level[:2 * n - 2]:
+            for byte_val in members:
+                lengths[byte_val] += 1
+        
+        return bytes(lengths)
+    
+    def _codes_from_lengths(self, lengths: bytes) -> Dict[int, tuple]:
+        """
+        Rebuild canonical codes from per-symbol code lengths
+        
+        Canonical Huffman assigns codes sequentially to symbols sorted by
+        (length, symbol), so the 256 lengths alone fully describe the code
+        and no tree needs to be serialized.
+        """
+        ordered = sorted((length, symbol) for symbol, length in enumerate(lengths) if length)
+        
+        codes = {}
+        code = 0
+        prev_length = ordered[0][0] if ordered else 0
+        
+        for length, symbol in ordered:
+            code <<= (length - prev_length)
+            codes[symbol] = (code, length)
+            code += 1
+            prev_length = length
+        
+        return codes
+    
+    def _decode_with_table(self, compressed_data: bytes, table: array.array,
+                           table_bits: int, effective_bits: int,
+                           long_codes: Dict, expected_size: int) -> bytearray:
+        """Pure-Python decode loop, used when numba is unavailable or the
+        code set includes entries longer than the table width."""
+        mask = (1 << table_bits) - 1
+        # The output size is in the header, so allocate it exactly once
+        # instead of paying bytearray's growth reallocations
+        decoded_data = bytearray(expected_size)
+        data_len = len(compressed_data)
+        buf = 0
+        nbits = 0
+        pos = 0
+        bits_left = effective_bits
+        i = 0
+
+        # Hoist hot attribute lookups out of the per-symbol loop
+        find_long = long_codes.get
+
+        while bits_left > 0 and i < expected_size:
+            while nbits < table_bits and pos < data_len:
+                buf = (buf << 8) | compressed_data[pos]
+                pos += 1
+                nbits += 8
+            
+            # Pre-shifting by table_bits makes one expression cover both the
+            # normal case and the zero-padded tail, with no branch
+            peek = ((buf << table_bits) >> nbits) & mask
+            
+            entry = table[peek]
+            length = entry & 0xFFFF
+            
+            if 0 < length <= bits_left:
+                decoded_data[i] = entry >> 16
+                i += 1
+                nbits -= length
+                bits_left -= length
+            else:
+                # Code longer than the table; extend bit by bit until it
+                # matches one of the (rare) long canonical codes
+                code_val = 0
+                code_len = 0
+                while True:
+                    if nbits == 0:
+                        buf = (buf << 8) | compressed_data[pos]
+                        pos += 1
+                        nbits += 8
+                    code_val = (code_val << 1) | ((buf >> (nbits - 1)) & 1)
+                    code_len += 1
+                    nbits -= 1
+                    bits_left -= 1
+                    symbol = find_long((code_len, code_val))
+                    if symbol is not None:
+                        decoded_data[i] = symbol
+                        i += 1
+                        break
+
+        # Trim in place on the (corrupt-input) short-decode path
+        if i != expected_size:
+            del decoded_data[i:]
+        return decoded_data
+    
+    def _build_decode_table(self, codes: Dict[int, tuple], table_bits: int) -> array.array:
+        """
+        Build a lookup table that decodes table_bits of input at once
+        
+        Every table slot whose high bits match a code maps to the packed
+        entry (symbol << 16) | code_length, so the decoder resolves a whole
+        symbol per lookup instead of walking the tree bit by bit. Codes
+        longer than table_bits leave their slots at 0 and fall back to a
+        tree walk.
+        """
+        table = array.array('I', bytes(4 << table_bits))
+        
+        for symbol, (code, length) in codes.items():
+            if length > table_bits:
+                continue
+            prefix = code << (table_bits - length)
+            entry = (symbol << 16) | length
+            for idx in range(prefix, prefix + (1 << (table_bits - length))):
+                table[idx] = entry
+        
+        return table
+    
+    def compress(self, input_file: str, output_file: str, return_data: bool = False,
+                 hint_tree: HuffmanNode = None) -> Dict[str, Any]:
         """
         Compress a file using Huffman coding
         
         Args:
             input_file: Path to input file
             output_file: Path to compressed output file
+            return_data: Include the serialized output bytes in the stats
+                         so callers can avoid re-reading the file from disk
+            hint_tree: Previously built Huffman tree to try first; reused
+                       only if it has a code for every byte value in the
+                       input, otherwise a fresh tree is built
             
         Returns:
-            Dictionary with compression statistics
+            Dictionary with compression statistics (the tree that was used
+            is included under the private '_tree' key for callers that cache)
         """
         # Read input file
         with open(input_file, 'rb') as f:
             data = f.read()
-        
+
         if not data:
             raise ValueError("Input file is empty")
-        
+
         original_size = len(data)
-        
-        # Build frequency table
-        freq_table = self._build_frequency_table(data)
-        
-        # Build Huffman tree
-        self.root = self._build_huffman_tree(freq_table)
-        
-        # Generate codes
-        self.codes = self._generate_codes(self.root)
-        self.reverse_codes = {v: k for k, v in self.codes.items()}
-        
-        # Encode data
-        encoded_bits = []
-        for byte in data:
-            encoded_bits.append(self.codes[byte])
-        
-        encoded_string = ''.join(encoded_bits)
-        
-        # Convert bit string to bytes
-        # Pad to make length multiple of 8
-        padding = 8 - len(encoded_string) % 8
-        if padding != 8:
-            encoded_string += '0' * padding
-        
-        # Convert to bytes
-        compressed_data = bytearray()
-        for i in range(0, len(encoded_string), 8):
-            byte = encoded_string[i:i+8]
-            compressed_data.append(int(byte, 2))
-        
-        # Save compressed file with metadata
-        compression_data = {
-            'compressed_data': bytes(compressed_data),
-            'tree': self.root,
-            'original_size': original_size,
-            'padding': padding
-        }
-        
+
+        # Large inputs split into independent blocks so the encoding can
+        # fan out across processes; everything else stays single-block
+        if original_size > _BLOCK_FORMAT_MIN:
+            container = self._compress_blocks(data)
+        else:
+            container = self._compress_single(data, hint_tree)
+
         with open(output_file, 'wb') as f:
-            pickle.dump(compression_data, f)
-        
-        compressed_size = os.path.getsize(output_file)
+            f.write(container)
+
+        compressed_size = len(container)
         compression_ratio = original_size / compressed_size if compressed_size > 0 else 0
 
-        return {
+        stats = {
             'original_size': original_size,
             'compressed_size': compressed_size,
             'compression_ratio': compression_ratio,
             'space_saved': ((original_size - compressed_size) / original_size) * 100,
-            'codes_generated': len(self.codes)
+            'codes_generated': len(self.codes),
+            '_tree': self.root
         }
-    
+        if return_data:
+            stats['compressed_data'] = container
+        return stats
+
+    def _compress_single(self, data: bytes, hint_tree: HuffmanNode = None) -> bytes:
+        """Build one code set for the whole input and pack it as a single block"""
+        freq_table = self._build_frequency_table(data)
+
+        # Reuse the hinted tree when it covers this input, otherwise build
+        self.root = None
+        if hint_tree is not None:
+            hint_codes = self._generate_codes(hint_tree)
+            if all(int(byte_val) in hint_codes for byte_val in np.nonzero(freq_table)[0]):
+                self.root = hint_tree
+                self.codes = hint_codes
+
+        if self.root is None:
+            self.root = self._build_huffman_tree(freq_table)
+            self.codes = self._generate_codes(self.root)
+
+        # Reassign codes canonically; the tree only determines the lengths
+        code_lengths = self._code_lengths(self.codes)
+
+        # Bound lengths to the decode-table width so decompression never
+        # needs the long-code fallback path
+        if max(code_lengths) > DECODE_TABLE_BITS:
+            code_lengths = self._limit_code_lengths(freq_table, DECODE_TABLE_BITS)
+
+        self.codes = self._codes_from_lengths(code_lengths)
+
+        compressed_data, padding = _pack_bits(data, self.codes)
+
+        # Fixed struct framing: header, code lengths, payload
+        return b''.join((
+            _HEADER.pack(_MAGIC, len(data), padding),
+            code_lengths,
+            compressed_data
+        ))
+
+    def _compress_blocks(self, data: bytes) -> bytes:
+        """
+        Compress the input as independent fixed-size blocks in parallel
+
+        Each block carries its own canonical code lengths, so the worker
+        processes share no state and the blocks can be encoded in any
+        order. Per-block framing is a (payload_len, raw_len, padding)
+        entry followed by the 256 code lengths and the packed bitstream.
+        """
+        chunks = [data[i:i + _BLOCK_SIZE] for i in range(0, len(data), _BLOCK_SIZE)]
+        # Spawn, not fork: forked children inherit numba threading-layer
+        # state from the parent and can deadlock at interpreter exit
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(chunks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            encoded = list(pool.map(_encode_block, chunks))
+
+        # Keep the first block's codes so get_compression_info still has
+        # a representative code set to describe
+        self.root = None
+        self.codes = self._codes_from_lengths(encoded[0][0])
+
+        parts = [_BLOCK_HEADER.pack(_BLOCK_MAGIC, len(data), len(chunks))]
+        for chunk, (code_lengths, padding, payload) in zip(chunks, encoded):
+            parts.append(_BLOCK_ENTRY.pack(len(payload), len(chunk), padding))
+            parts.append(code_lengths)
+            parts.append(payload)
+        return b''.join(parts)
+
     def decompress(self, compressed_file: str, output_file: str) -> Dict[str, Any]:
         """
         Decompress a Huffman encoded file with comprehensive statistics
@@ -175,63 +516,120 @@ class HuffmanCompressor:
         Returns:
             Dictionary with detailed decompression statistics and metadata
         """
-        import time
-        import os
-        
         start_time = time.time()
         
         try:
-            # Load compressed data
+            # Map the compressed file instead of reading it up front: the
+            # header parse and decoders fault in pages on demand, so the
+            # payload never exists as a second in-memory copy (the map is
+            # released when the function's views are dropped)
             with open(compressed_file, 'rb') as f:
-                compression_data = pickle.load(f)
-            
-            compressed_data = compression_data['compressed_data']
-            tree_root = compression_data['tree']
-            original_size = compression_data['original_size']
-            padding = compression_data['padding']
+                raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
             
-            # Get additional metadata if available
-            huffman_codes = compression_data.get('huffman_codes', {})
-            frequency_table = compression_data.get('frequency_table', {})
-            compression_timestamp = compression_data.get('timestamp', None)
+            huffman_codes = {}
+            frequency_table = {}
+            compression_timestamp = None
             
             # File size information
             compressed_file_size = os.path.getsize(compressed_file)
+
+            if raw[:4] == _BLOCK_MAGIC:
+                # Block container: parse the cheap per-block headers
+                # sequentially, then decode the independent blocks in
+                # parallel worker processes
+                _, original_size, block_count = _BLOCK_HEADER.unpack_from(raw)
+                offset = _BLOCK_HEADER.size
+                blocks = []
+                total_bits_before_padding = 0
+                effective_bits = 0
+                tree_depth = 0
+                used_symbols = set()
+                for _ in range(block_count):
+                    payload_len, raw_len, block_padding = _BLOCK_ENTRY.unpack_from(raw, offset)
+                    offset += _BLOCK_ENTRY.size
+                    code_lengths = raw[offset:offset + 256]
+                    offset += 256
+                    payload = raw[offset:offset + payload_len]
+                    offset += payload_len
+                    blocks.append((code_lengths, block_padding, raw_len, payload))
+                    total_bits_before_padding += payload_len * 8
+                    effective_bits += payload_len * 8 - (block_padding if block_padding != 8 else 0)
+                    tree_depth = max(tree_depth, max(code_lengths))
+                    used_symbols.update(s for s, l in enumerate(code_lengths) if l)
+
+                # Spawn for the same reason as _compress_blocks
+                with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(blocks)),
+                                         mp_context=multiprocessing.get_context('spawn')) as pool:
+                    decoded_data = b''.join(pool.map(_decode_block, blocks))
+
+                unique_characters = len(used_symbols)
+                padding = 8  # per-block padding already folded into effective_bits
+            else:
+                if raw[:4] == _MAGIC:
+                    _, original_size, padding = _HEADER.unpack_from(raw)
+                    lengths_end = _HEADER.size + 256
+                    codes, table, table_bits, long_codes = _decode_setup_from_lengths(
+                        raw[_HEADER.size:lengths_end]
+                    )
+                    # View, not copy: the decoders only read from it
+                    compressed_data = memoryview(raw)[lengths_end:]
+                else:
+                    # Legacy pickle container, possibly still carrying a tree
+                    compression_data = pickle.loads(raw)
+                    compressed_data = compression_data['compressed_data']
+                    original_size = compression_data['original_size']
+                    padding = compression_data['padding']
+                
+                    if 'code_lengths' in compression_data:
+                        codes, table, table_bits, long_codes = _decode_setup_from_lengths(
+                            bytes(compression_data['code_lengths'])
+                        )
+                    else:
+                        codes = self._codes_from_node_tree(compression_data['tree'])
+                        table_bits = min(DECODE_TABLE_BITS, max(length for _, length in codes.values()))
+                        table = self._build_decode_table(codes, table_bits)
+                        long_codes = {
+                            (length, code): symbol
+                            for symbol, (code, length) in codes.items() if length > table_bits
+                        }
+                
+                    huffman_codes = compression_data.get('huffman_codes', {})
+                    frequency_table = compression_data.get('frequency_table', {})
+                    compression_timestamp = compression_data.get('timestamp', None)
             
-            # Convert bytes back to bit string
-            bit_string = ''.join(format(byte, '08b') for byte in compressed_data)
-            total_bits_before_padding = len(bit_string)
-            
-            # Remove padding
-            if padding != 8:
-                bit_string = bit_string[:-padding]
-            
-            effective_bits = len(bit_string)
+                # Bit counts follow from the payload size; no need to
+                # materialize the bitstream as a string
+                total_bits_before_padding = len(compressed_data) * 8
+                effective_bits = total_bits_before_padding - (padding if padding != 8 else 0)
             
-            # Decode using tree
-            decoded_data = bytearray()
-            current_node = tree_root
-            chars_decoded = 0
+                # Decode with a lookup table: peek the next table_bits bits from
+                # a 64-bit style integer buffer and emit one symbol per lookup
+                if njit is not None and not long_codes:
+                    # All codes fit the table: run the whole loop as native code
+                    out = np.empty(original_size, dtype=np.uint8)
+                    produced = _decode_numba(
+                        np.frombuffer(compressed_data, dtype=np.uint8),
+                        np.frombuffer(table, dtype=np.uint32),
+                        table_bits, effective_bits, out
+                    )
+                    decoded_data = out[:produced]
+                else:
+                    decoded_data = self._decode_with_table(
+                        compressed_data, table, table_bits, effective_bits,
+                        long_codes, original_size
+                    )
             
-            for bit in bit_string:
-                if current_node.char is not None:  # Leaf node
-                    decoded_data.append(current_node.char)
-                    chars_decoded += 1
-                    current_node = tree_root
                 
-                if bit == '0':
-                    current_node = current_node.left
-                else:
-                    current_node = current_node.right
+                tree_depth = max(length for _, length in codes.values())
+                unique_characters = len(codes)
             
-            # Handle last character
-            if current_node and current_node.char is not None:
-                decoded_data.append(current_node.char)
-                chars_decoded += 1
+            chars_decoded = len(decoded_data)
+
             
-            # Write decompressed file
+            # Write decompressed file straight from the decode buffer;
+            # write() takes any buffer object, so no bytes() copy is needed
             with open(output_file, 'wb') as f:
-                f.write(bytes(decoded_data))
+                f.write(decoded_data)
             
             end_time = time.time()
             decompression_time = end_time - start_time
@@ -263,8 +661,8 @@ class HuffmanCompressor:
                 'decompression_time_seconds': round(decompression_time, 4),
                 
                 # Tree information
-                'tree_depth': self._calculate_tree_depth(tree_root) if hasattr(self, '_calculate_tree_depth') else None,
-                'unique_characters': len(huffman_codes) if huffman_codes else None,
+                'tree_depth': tree_depth,
+                'unique_characters': unique_characters,
                 
                 # Metadata
                 'compression_timestamp': compression_timestamp,
@@ -291,7 +689,7 @@ class HuffmanCompressor:
         if not self.codes:
             return {}
         
-        code_lengths = [len(code) for code in self.codes.values()]
+        code_lengths = [length for _, length in self.codes.values()]
         avg_code_length = sum(code_lengths) / len(code_lengths)
         
         return {
@@ -299,17 +697,124 @@ class HuffmanCompressor:
             'average_code_length': avg_code_length,
             'min_code_length': min(code_lengths),
             'max_code_length': max(code_lengths),
-            'codes': {chr(k) if 32 <= k <= 126 else f'\\x{k:02x}': v 
+            'codes': {chr(k) if 32 <= k <= 126 else f'\\x{k:02x}': format(v[0], f'0{v[1]}b')
                      for k, v in list(self.codes.items())[:10]}  # Show first 10
         }
 
-def compress_file(input_path: str, output_path: str = None) -> Dict[str, Any]:
+@lru_cache(maxsize=32)
+def _decode_setup_from_lengths(lengths: bytes):
+    """
+    Build the decode machinery for one canonical code-length set
+    
+    The codes, lookup table and long-code map are fully determined by the
+    256-byte length header, so an LRU keyed on it lets repeated archives
+    of the same file type skip table construction entirely. The returned
+    objects are shared between calls and must be treated as read-only.
+    """
+    compressor = HuffmanCompressor()
+    codes = compressor._codes_from_lengths(lengths)
+    table_bits = min(DECODE_TABLE_BITS, max(length for _, length in codes.values()))
+    table = compressor._build_decode_table(codes, table_bits)
+    long_codes = {
+        (length, code): symbol
+        for symbol, (code, length) in codes.items() if length > table_bits
+    }
+    return codes, table, table_bits, long_codes
+
+def _pack_bits(data: bytes, codes: Dict[int, tuple]) -> tuple:
+    """
+    Pack the data's code sequence into bytes in one fused pass
+
+    Shifts each byte's code into an integer accumulator and emits whole
+    bytes as they fill, so no intermediate bit buffer is materialized.
+    Returns the packed payload and the padding bit count (8 means none).
+    """
+    code_table = np.zeros(256, dtype=np.int64)
+    len_table = np.zeros(256, dtype=np.int64)
+    for symbol, (code, length) in codes.items():
+        code_table[symbol] = code
+        len_table[symbol] = length
+
+    data_arr = np.frombuffer(data, dtype=np.uint8)
+
+    # The output byte count is a table lookup-sum, known before a single
+    # bit is written; the last byte is zero-padded to the boundary
+    total_bits = int(len_table[data_arr].sum())
+    padding = 8 - total_bits % 8
+
+    if njit is not None:
+        out = np.empty((total_bits + 7) // 8, dtype=np.uint8)
+        _pack_bits_numba(data_arr, code_table, len_table, out)
+        return out.tobytes(), padding
+
+    buf = 0
+    nbits = 0
+    out = bytearray()
+    emit = out.append
+    for byte in data:
+        code, length = codes[byte]
+        buf = (buf << length) | code
+        nbits += length
+        while nbits >= 8:
+            nbits -= 8
+            emit((buf >> nbits) & 0xFF)
+            buf &= (1 << nbits) - 1
+    if nbits:
+        emit((buf << (8 - nbits)) & 0xFF)
+    return bytes(out), padding
+
+def _encode_block(chunk: bytes) -> tuple:
+    """
+    Build a code set for one block and pack its bitstream
+
+    Module-level so it pickles into worker processes. Returns
+    (code_lengths, padding, payload).
+    """
+    compressor = HuffmanCompressor()
+    freq_table = compressor._build_frequency_table(chunk)
+    tree = compressor._build_huffman_tree(freq_table)
+    code_lengths = compressor._code_lengths(compressor._generate_codes(tree))
+    if max(code_lengths) > DECODE_TABLE_BITS:
+        code_lengths = compressor._limit_code_lengths(freq_table, DECODE_TABLE_BITS)
+    codes = compressor._codes_from_lengths(code_lengths)
+    payload, padding = _pack_bits(chunk, codes)
+    return code_lengths, padding, payload
+
+def _decode_block(block: tuple) -> bytes:
+    """
+    Decode one block parsed from a block container entry
+
+    Module-level so it pickles into worker processes. block is a
+    (code_lengths, padding, raw_len, payload) tuple.
+    """
+    code_lengths, padding, raw_len, payload = block
+    codes, table, table_bits, long_codes = _decode_setup_from_lengths(bytes(code_lengths))
+    effective_bits = len(payload) * 8 - (padding if padding != 8 else 0)
+
+    if njit is not None and not long_codes:
+        out = np.empty(raw_len, dtype=np.uint8)
+        produced = _decode_numba(
+            np.frombuffer(payload, dtype=np.uint8),
+            np.frombuffer(table, dtype=np.uint32),
+            table_bits, effective_bits, out
+        )
+        return out[:produced].tobytes()
+
+    decoded = HuffmanCompressor()._decode_with_table(
+        payload, table, table_bits, effective_bits, long_codes, raw_len
+    )
+    return bytes(decoded)
+
+def compress_file(input_path: str, output_path: str = None, return_data: bool = False,
+                  hint_tree: HuffmanNode = None) -> Dict[str, Any]:
     """
     Convenience function to compress any file
     
     Args:
         input_path: Path to file to compress
         output_path: Output path (optional)
+        return_data: Include the serialized output bytes in the stats
+        hint_tree: Previously built Huffman tree to try before building fresh
     
     Returns:
         Compression statistics
@@ -318,7 +823,8 @@ def compress_file(input_path: str, output_path: str = None) -> Dict[str, Any]:
         output_path = input_path + '.huff'
     
     compressor = HuffmanCompressor()
-    stats = compressor.compress(input_path, output_path)
+    stats = compressor.compress(input_path, output_path, return_data=return_data,
+                                hint_tree=hint_tree)
     compression_info = compressor.get_compression_info()
     
     return {**stats, 'compression_info': compression_info}
@@ -1,8 +1,171 @@
-import pickle
+import mmap
+import multiprocessing
 import os
+import struct
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Tuple, Any, Optional, List
 
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # numba/numpy are optional; fall back to pure Python
+    njit = None
+
+# Legacy triplet wire format: distance (2 bytes, big-endian), length,
+# next_char -- still read, no longer written
+_TRIPLET = struct.Struct('>HBB')
+
+# Container layout: magic, original size, window size, lookahead size,
+# then the packed token stream. LZSS marks the control-bit token format;
+# LZ77 archives carry the older fixed 4-byte triplet stream
+_MAGIC = b'LZSS'
+_LEGACY_MAGIC = b'LZ77'
+_HEADER = struct.Struct('<4sIHH')
+
+# Inputs above _BLOCK_FORMAT_MIN are stored as independent fixed-size
+# blocks (each with its own sliding window) so compression and
+# decompression can run per block in parallel processes. Block container
+# layout: magic, original size, window size, lookahead size, block
+# count, then per block a (payload_len, raw_len) entry and the block's
+# token stream
+_BLOCK_SIZE = 256 * 1024
+_BLOCK_FORMAT_MIN = 4 * _BLOCK_SIZE
+_BLOCK_MAGIC = b'LZSB'
+_BLOCK_HEADER = struct.Struct('<4sIHHI')
+_BLOCK_ENTRY = struct.Struct('<II')
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _compress_numba(buf, window_size, lookahead_size, out):
+        """Generate LZ77 triplets into the preallocated out array.
+
+        Match search uses a hash chain keyed on 3-byte prefixes (the gzip
+        approach): head[h] holds the most recent position with hash h and
+        prev[] links earlier ones, so each position walks a short chain of
+        candidates instead of scanning the whole window. Each row of out
+        holds (distance, length, literal); matches do not consume a
+        trailing literal. Returns (token_count, matches_found,
+        total_match_length).
+        """
+        n = buf.shape[0]
+        head = np.full(65536, -1, dtype=np.int64)
+        prev = np.full(n, -1, dtype=np.int64)
+        max_chain = 128
+        count = 0
+        matches_found = 0
+        total_match_length = 0
+        i = 0
+        while i < n:
+            best_distance = 0
+            best_length = 0
+            
+            if i + 2 < n:
+                h = ((np.int64(buf[i]) << 8) ^
+                     (np.int64(buf[i + 1]) << 4) ^
+                     np.int64(buf[i + 2]))
+                window_start = i - window_size
+                lookahead_end = min(n, i + lookahead_size)
+                limit = lookahead_end - i
+                j = head[h]
+                chain = 0
+                while j >= 0 and j >= window_start and chain < max_chain:
+                    # Fast reject once a match is in hand (zlib's
+                    # compare258 pattern): an improving candidate must
+                    # agree on the byte just past the current best and
+                    # on the 4-byte prefix, so test those few bytes
+                    # before paying for the full extension compare
+                    if best_length >= 3:
+                        if (best_length >= limit or
+                                buf[j + best_length] != buf[i + best_length] or
+                                buf[j] != buf[i] or
+                                buf[j + 1] != buf[i + 1] or
+                                buf[j + 2] != buf[i + 2] or
+                                buf[j + 3] != buf[i + 3]):
+                            j = prev[j]
+                            chain += 1
+                            continue
+                    match_length = 0
+                    # Compare 8 bytes per step (the zlib-ng idiom) and
+                    # finish the tail a byte at a time
+                    while (match_length + 8 <= limit and
+                           (buf[j + match_length:j + match_length + 8] ==
+                            buf[i + match_length:i + match_length + 8]).all()):
+                        match_length += 8
+                    while (match_length < limit and
+                           buf[j + match_length] == buf[i + match_length]):
+                        match_length += 1
+                    if match_length > best_length:
+                        best_length = match_length
+                        best_distance = i - j
+                        if best_length >= lookahead_size:
+                            break
+                    j = prev[j]
+                    chain += 1
+                prev[i] = head[h]
+                head[h] = i
+            
+            if best_length >= 3:
+                out[count, 0] = best_distance
+                out[count, 1] = best_length
+                out[count, 2] = 0
+                matches_found += 1
+                total_match_length += best_length
+                # The positions the match skips over still enter the
+                # hash chain, so later searches can start matches
+                # inside this one
+                for p in range(i + 1, min(i + best_length, n - 2)):
+                    hp = ((np.int64(buf[p]) << 8) ^
+                          (np.int64(buf[p + 1]) << 4) ^
+                          np.int64(buf[p + 2]))
+                    prev[p] = head[hp]
+                    head[hp] = p
+                i += best_length
+            else:
+                out[count, 0] = 0
+                out[count, 1] = 0
+                out[count, 2] = buf[i]
+                i += 1
+            count += 1
+
+        return count, matches_found, total_match_length
+
+    @njit(cache=True, boundscheck=False)
+    def _encode_tokens_numba(rows, count, out):
+        """Pack token rows into the LZSS control-bit stream.
+
+        Writes into the preallocated out array and returns how many
+        bytes were produced.
+        """
+        pos = 0
+        ctrl_pos = -1
+        ctrl = 0
+        bit = 8
+        for k in range(count):
+            if bit == 8:
+                if ctrl_pos >= 0:
+                    out[ctrl_pos] = ctrl
+                ctrl_pos = pos
+                pos += 1
+                ctrl = 0
+                bit = 0
+            distance = rows[k, 0]
+            if distance > 0:
+                ctrl |= 1 << bit
+                # No clamps needed: distance is bounded by the window
+                # (<= 32768) and length by the lookahead (<= 255)
+                out[pos] = distance >> 8
+                out[pos + 1] = distance & 0xFF
+                out[pos + 2] = rows[k, 1] - 3
+                pos += 3
+            else:
+                out[pos] = rows[k, 2]
+                pos += 1
+            bit += 1
+        if ctrl_pos >= 0:
+            out[ctrl_pos] = ctrl
+        return pos
+
 class LZ77Compressor:
     """
     LZ77 (Lempel-Ziv 1977) Compression Algorithm
@@ -14,14 +177,14 @@ class LZ77Compressor:
     How it works:
     1. Maintain a sliding window of recently processed data (dictionary)
     2. For each position, find the longest match in the sliding window
-    3. Output a triplet: (distance, length, next_character)
+    3. Output a match token (distance, length) or a literal byte
     4. Move the window forward and repeat
-    
-    The output consists of:
-    - Distance: How far back the match starts (0 if no match)
-    - Length: How long the match is (0 if no match)  
-    - Next character: The character following the match
-    
+
+    The output is an LZSS-style token stream: each group of up to 8
+    tokens is led by a control byte whose bits say literal (one raw
+    byte) or match (distance and length). Matches do not waste a
+    trailing literal byte.
+
     Benefits:
     - Excellent for text and structured data with repeated patterns
     - Foundation for many modern compression algorithms (ZIP, GZIP, PNG)
@@ -77,26 +240,68 @@ class LZ77Compressor:
         
         best_distance = 0
         best_length = 0
-        
-        # Search for matches in the sliding window
-        for i in range(window_start, window_end):
+
+        if lookahead_start >= lookahead_end:
+            return 0, 0
+
+        # Let bytes.find (C memchr) jump between window positions whose
+        # first byte matches, instead of touching every window byte;
+        # hoist the attribute lookups out of the candidate loop
+        first = data[current_pos]
+        find = data.find
+        max_length = self.lookahead_size
+
+        if njit is not None:
+            # One vectorized compare per candidate: the first False in
+            # the equality mask is the mismatch position, so the match
+            # length falls out of a single C pass instead of a byte loop
+            arr = np.frombuffer(data, dtype=np.uint8)
+            look = arr[lookahead_start:lookahead_end]
+            look_len = look.size
+            i = find(first, window_start, window_end)
+            while i >= 0:
+                span = min(look_len, window_end - i)
+                eq = arr[i:i + span] == look[:span]
+                match_length = span if eq.all() else int(np.argmin(eq))
+
+                if match_length > best_length:
+                    best_length = match_length
+                    best_distance = current_pos - i
+
+                    if best_length >= max_length:
+                        break
+                i = find(first, i + 1, window_end)
+
+            if best_length >= 3:
+                return best_distance, best_length
+            return 0, 0
+
+        # Snapshot the lookahead so the inner compare indexes a short
+        # local bytes object instead of recomputing two offsets
+        look = data[lookahead_start:lookahead_end]
+        look_len = len(look)
+
+        # Search for matching window positions
+        i = find(first, window_start, window_end)
+        while i >= 0:
             # Check how long the match is
             match_length = 0
-            
+
             # Compare bytes until mismatch or end of lookahead
-            while (i + match_length < window_end and 
-                   lookahead_start + match_length < lookahead_end and
-                   data[i + match_length] == data[lookahead_start + match_length]):
+            while (i + match_length < window_end and
+                   match_length < look_len and
+                   data[i + match_length] == look[match_length]):
                 match_length += 1
-            
+
             # Update best match if this one is longer
             if match_length > best_length:
                 best_length = match_length
                 best_distance = current_pos - i
-                
+
                 # Early termination if we've reached maximum possible length
-                if best_length >= self.lookahead_size:
+                if best_length >= max_length:
                     break
+            i = find(first, i + 1, window_end)
         
         # Only return matches of length 3 or more (typical LZ77 threshold)
         if best_length >= 3:
@@ -104,137 +309,262 @@ class LZ77Compressor:
         else:
             return 0, 0
     
-    def _encode_triplet(self, distance: int, length: int, next_char: int) -> bytes:
+    def _encode_tokens(self, triplets) -> bytes:
         """
-        Encode a LZ77 triplet into bytes
-        
-        Format: [DISTANCE_HIGH][DISTANCE_LOW][LENGTH][NEXT_CHAR]
-        - Distance: 2 bytes (big-endian)
-        - Length: 1 byte
-        - Next char: 1 byte
-        
-        Total: 4 bytes per triplet
+        Encode the token rows as an LZSS control-bit stream
+
+        Each group of up to 8 tokens is preceded by a control byte whose
+        bits mark literal (0: one raw byte) versus match (1: big-endian
+        distance then length - 3). The kernel's row array goes through
+        the njit emitter; the list fallback packs into a bytearray.
         """
-        # Ensure values fit in their allocated space
-        distance = min(distance, 65535)  # 2 bytes max
-        length = min(length, 255)       # 1 byte max
-        next_char = next_char & 0xFF    # 1 byte
-        
-        return bytes([
-            (distance >> 8) & 0xFF,  # High byte of distance
-            distance & 0xFF,         # Low byte of distance
-            length,                  # Length
-            next_char               # Next character
-        ])
-    
+        if njit is not None and isinstance(triplets, np.ndarray):
+            out = np.empty(3 * len(triplets) + len(triplets) // 8 + 2, dtype=np.uint8)
+            produced = _encode_tokens_numba(triplets, len(triplets), out)
+            return out[:produced].tobytes()
+
+        out = bytearray()
+        ctrl_pos = -1
+        ctrl = 0
+        bit = 8
+        for distance, length, literal in triplets:
+            if bit == 8:
+                if ctrl_pos >= 0:
+                    out[ctrl_pos] = ctrl
+                ctrl_pos = len(out)
+                out.append(0)
+                ctrl = 0
+                bit = 0
+            if distance > 0:
+                ctrl |= 1 << bit
+                out.append(distance >> 8)
+                out.append(distance & 0xFF)
+                out.append(length - 3)
+            else:
+                out.append(literal)
+            bit += 1
+        if ctrl_pos >= 0:
+            out[ctrl_pos] = ctrl
+        return bytes(out)
+
     def _decode_triplet(self, data: bytes, offset: int) -> Tuple[int, int, int, int]:
         """
         Decode a triplet from bytes
-        
+
         Returns:
             Tuple of (distance, length, next_char, bytes_consumed)
         """
         if offset + 3 >= len(data):
             raise ValueError("Incomplete triplet data")
-        
-        distance = (data[offset] << 8) | data[offset + 1]
-        length = data[offset + 2]
-        next_char = data[offset + 3]
-        
+
+        distance, length, next_char = _TRIPLET.unpack_from(data, offset)
+
         return distance, length, next_char, 4
     
-    def _compress_data(self, data: bytes) -> List[Tuple[int, int, int]]:
+    def _compress_data(self, data: bytes):
         """
         Compress data into LZ77 triplets
-        
+
         Returns:
-            List of triplets (distance, length, next_char)
+            The (distance, length, next_char) triplets: an (n, 3) int32
+            array from the numba kernel, or a list of tuples from the
+            pure-Python fallback (both unpack the same way)
         """
-        triplets = []
+        if njit is not None:
+            buf = np.frombuffer(data, dtype=np.uint8)
+            out = np.empty((len(data), 3), dtype=np.int32)
+            count, matches_found, total_match_length = _compress_numba(
+                buf, self.window_size, self.lookahead_size, out
+            )
+            # Hand back a view of the presized array; converting every
+            # row to a Python tuple would cost more than the kernel did
+            triplets = out[:count]
+            lengths = triplets[:, 1]
+            saving = lengths[(triplets[:, 0] > 0) & (lengths > 3)] - 3
+            self.stats.update({
+                'matches_found': int(matches_found),
+                'total_match_length': int(total_match_length),
+                'literals': count - int(matches_found),
+                'saved_bytes': int(saving.sum())
+            })
+            return triplets
+        
         i = 0
         matches_found = 0
         total_match_length = 0
-        
-        while i < len(data):
-            # Find longest match in sliding window
-            distance, length = self._find_longest_match(data, i)
-            
-            if distance > 0 and length > 0:
+        saved_bytes = 0
+        n = len(data)
+
+        # Presize the token list (worst case one token per byte) and fill
+        # through an index so the loop never pays append's amortized
+        # doubling, which re-copies the pointer array ~log2(n) times
+        triplets = [None] * n
+        count = 0
+
+        # Same hash chain as the numba kernel, in Python: head[h] holds
+        # the most recent position whose 3-byte prefix hashes to h and
+        # prev[] links the earlier ones, so each search only visits
+        # positions that can actually match instead of the whole window
+        head = [-1] * 65536
+        prev = [-1] * n
+        max_chain = 128
+
+        # Slice comparisons on a memoryview run as C memcmp, so match
+        # extension probes whole chunks instead of one byte per iteration
+        mv = memoryview(data)
+
+        # Hoist per-iteration attribute lookups out of the main loop
+        window_size = self.window_size
+        lookahead_size = self.lookahead_size
+
+        while i < n:
+            best_distance = 0
+            best_length = 0
+
+            if i + 2 < n:
+                h = (data[i] << 8) ^ (data[i + 1] << 4) ^ data[i + 2]
+                window_start = i - window_size
+                lookahead_end = min(n, i + lookahead_size)
+                j = head[h]
+                chain = 0
+                limit = lookahead_end - i
+                while j >= 0 and j >= window_start and chain < max_chain:
+                    # Fast reject once a match is in hand (zlib's
+                    # compare258 pattern): an improving candidate must
+                    # agree on the byte just past the current best and
+                    # on the 4-byte prefix
+                    if best_length >= 3:
+                        if (best_length >= limit or
+                                mv[j + best_length] != mv[i + best_length] or
+                                mv[j:j + 4] != mv[i:i + 4]):
+                            j = prev[j]
+                            chain += 1
+                            continue
+                    # Exponential probe: double the compared span while it
+                    # still matches, then bisect down to the exact length
+                    k = 1
+                    while k <= limit and mv[j:j + k] == mv[i:i + k]:
+                        k <<= 1
+                    lo = k >> 1
+                    hi = min(k - 1, limit)
+                    while lo < hi:
+                        mid = (lo + hi + 1) >> 1
+                        if mv[j:j + mid] == mv[i:i + mid]:
+                            lo = mid
+                        else:
+                            hi = mid - 1
+                    match_length = lo
+                    if match_length > best_length:
+                        best_length = match_length
+                        best_distance = i - j
+                        if best_length >= lookahead_size:
+                            break
+                    j = prev[j]
+                    chain += 1
+                prev[i] = head[h]
+                head[h] = i
+
+            if best_length >= 3:
                 # Found a match
-                next_char_pos = i + length
-                next_char = data[next_char_pos] if next_char_pos < len(data) else 0
-                
-                triplets.append((distance, length, next_char))
+                triplets[count] = (best_distance, best_length, 0)
                 matches_found += 1
-                total_match_length += length
-                
-                # Move past the match and the next character
-                i += length + 1
+                total_match_length += best_length
+                if best_length > 3:
+                    saved_bytes += best_length - 3
+
+                # The positions the match skips over still enter the
+                # hash chain, so later searches can start matches
+                # inside this one
+                for p in range(i + 1, min(i + best_length, n - 2)):
+                    hp = (data[p] << 8) ^ (data[p + 1] << 4) ^ data[p + 2]
+                    prev[p] = head[hp]
+                    head[hp] = p
+
+                # Move past the match
+                i += best_length
             else:
                 # No match found, store literal character
-                triplets.append((0, 0, data[i]))
+                triplets[count] = (0, 0, data[i])
                 i += 1
-        
+            count += 1
+
+        # Trim the unused tail left by matches covering several bytes
+        del triplets[count:]
+
         # Update statistics
         self.stats.update({
             'matches_found': matches_found,
             'total_match_length': total_match_length,
-            'literals': len(triplets) - matches_found
+            'literals': count - matches_found,
+            'saved_bytes': saved_bytes
         })
-        
+
         return triplets
     
-    def compress(self, input_file: str, output_file: str) -> Dict[str, Any]:
+    def compress(self, input_file: str, output_file: str, return_data: bool = False) -> Dict[str, Any]:
         """
         Compress a file using LZ77 algorithm
         
         Args:
             input_file: Path to input file
             output_file: Path to compressed output file
+            return_data: Include the serialized output bytes in the stats
+                         so callers can avoid re-reading the file from disk
             
         Returns:
             Dictionary with compression statistics
         """
-        # Read input file
+        # Map the input file instead of copying it into a bytes object:
+        # compression only reads the buffer, so the page cache serves as
+        # the working copy and no full-size read-time copy is paid
         with open(input_file, 'rb') as f:
-            data = f.read()
-        
-        if not data:
-            raise ValueError("Input file is empty")
-        
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Input file is empty")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self._compress_buffer(data, output_file, return_data)
+
+    def _compress_buffer(self, data, output_file: str, return_data: bool) -> Dict[str, Any]:
+        """Compress one readable buffer (bytes or mmap) to output_file"""
         original_size = len(data)
         
-        # Analyze input data
-        byte_counts = Counter(data)
-        
-        # Compress data
-        triplets = self._compress_data(data)
-        
-        # Encode triplets to bytes
-        compressed_data = bytearray()
-        for distance, length, next_char in triplets:
-            compressed_data.extend(self._encode_triplet(distance, length, next_char))
-        
-        # Calculate additional statistics
-        matches = sum(1 for d, l, _ in triplets if d > 0)
-        literals = len(triplets) - matches
-        saved_bytes = sum(l - 4 for d, l, _ in triplets if d > 0 and l > 4)  # Only matches longer than triplet size save space
-        
-        # Save compressed file with metadata
-        compression_data = {
-            'compressed_data': bytes(compressed_data),
-            'original_size': original_size,
-            'window_size': self.window_size,
-            'lookahead_size': self.lookahead_size,
-            'triplet_count': len(triplets),
-            'matches': matches,
-            'literals': literals
-        }
-        
+        # Analyze input data: one C histogram pass instead of hashing
+        # every byte through a Counter
+        if njit is not None:
+            counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+            unique_bytes = int((counts > 0).sum())
+            most_common_idx = int(counts.argmax())
+            most_common_byte = (most_common_idx, int(counts[most_common_idx]))
+        else:
+            # bytes(...) because iterating an mmap yields byte strings,
+            # not integers
+            byte_counts = Counter(bytes(data))
+            unique_bytes = len(byte_counts)
+            most_common_byte = byte_counts.most_common(1)[0] if byte_counts else None
+
+        # Large inputs split into independent blocks so the match search
+        # can fan out across processes; everything else stays single-block
+        if original_size > _BLOCK_FORMAT_MIN:
+            container, token_count = self._compress_blocks(data)
+        else:
+            triplets = self._compress_data(data)
+            compressed_data = self._encode_tokens(triplets)
+            # Fixed struct framing: header, then the token stream as-is
+            header = _HEADER.pack(_MAGIC, original_size, self.window_size, self.lookahead_size)
+            container = header + compressed_data
+            token_count = len(triplets)
+
+        # Match statistics were accumulated during the compression pass
+        # itself, so no extra sweeps over the triplet list are needed
+        matches = self.stats['matches_found']
+        literals = self.stats['literals']
+        total_match_length = self.stats['total_match_length']
+        # Only matches longer than a match token save space
+        saved_bytes = self.stats['saved_bytes']
+
         with open(output_file, 'wb') as f:
-            pickle.dump(compression_data, f)
-        
-        compressed_size = os.path.getsize(output_file)
+            f.write(container)
+
+        compressed_size = len(container)
         compression_ratio = original_size / compressed_size if compressed_size > 0 else 0
         
         self.stats = {
@@ -242,18 +572,60 @@ class LZ77Compressor:
             'compressed_size': compressed_size,
             'compression_ratio': compression_ratio,
             'space_saved': ((original_size - compressed_size) / original_size) * 100,
-            'triplets_generated': len(triplets),
+            'triplets_generated': token_count,
             'matches_found': matches,
             'literals': literals,
             'bytes_saved_from_matches': saved_bytes,
-            'average_match_length': sum(l for d, l, _ in triplets if d > 0) / matches if matches > 0 else 0,
-            'unique_bytes': len(byte_counts),
-            'most_common_byte': byte_counts.most_common(1)[0] if byte_counts else None,
+            'average_match_length': total_match_length / matches if matches > 0 else 0,
+            'unique_bytes': unique_bytes,
+            'most_common_byte': most_common_byte,
             'compression_efficiency': (saved_bytes / original_size) * 100 if original_size > 0 else 0
         }
         
+        if return_data:
+            return {**self.stats, 'compressed_data': container}
         return self.stats
-    
+
+    def _compress_blocks(self, data: bytes) -> Tuple[bytes, int]:
+        """
+        Compress the input as independent fixed-size blocks in parallel
+
+        Each block starts its own sliding window, so the worker
+        processes share no state and the blocks can be encoded in any
+        order; matches that would have crossed a block boundary are
+        given up for the parallelism. Returns the block container and
+        the total token count.
+        """
+        chunks = [data[i:i + _BLOCK_SIZE] for i in range(0, len(data), _BLOCK_SIZE)]
+        args = [(chunk, self.window_size, self.lookahead_size) for chunk in chunks]
+        # Spawn, not fork: forked children inherit numba threading-layer
+        # state from the parent and can deadlock at interpreter exit
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(chunks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            encoded = list(pool.map(_compress_block, args))
+
+        token_count = 0
+        matches_found = 0
+        total_match_length = 0
+        saved_bytes = 0
+        parts = [_BLOCK_HEADER.pack(_BLOCK_MAGIC, len(data), self.window_size,
+                                    self.lookahead_size, len(chunks))]
+        for chunk, (payload, tokens, matches, match_length, saved) in zip(chunks, encoded):
+            parts.append(_BLOCK_ENTRY.pack(len(payload), len(chunk)))
+            parts.append(payload)
+            token_count += tokens
+            matches_found += matches
+            total_match_length += match_length
+            saved_bytes += saved
+
+        self.stats.update({
+            'matches_found': matches_found,
+            'total_match_length': total_match_length,
+            'literals': token_count - matches_found,
+            'saved_bytes': saved_bytes
+        })
+        return b''.join(parts), token_count
+
     def decompress(self, compressed_file: str, output_file: str) -> Dict[str, Any]:
         """
         Decompress an LZ77 encoded file
@@ -265,28 +637,88 @@ class LZ77Compressor:
         Returns:
             Dictionary with decompression statistics
         """
-        # Validate file format
-        with open(compressed_file, 'rb') as f:
-            header = f.read(10)
-            
-        # Check for common non-LZ77 file types
-        if header.startswith(b'\x89PNG'):
-            raise ValueError(f"File {compressed_file} is a PNG image, not an LZ77-compressed file")
-        
-        if header.startswith(b'JFIF') or header.startswith(b'\xff\xd8'):
-            raise ValueError(f"File {compressed_file} is a JPEG image, not an LZ77-compressed file")
-        
-        if not (header.startswith(b'\x80\x03') or header.startswith(b'\x80\x04') or header.startswith(b'\x80\x05')):
-            raise ValueError(f"File {compressed_file} does not appear to be a pickle file (expected LZ77 format)")
-        
         # Load compressed data
         with open(compressed_file, 'rb') as f:
-            compression_data = pickle.load(f)
-        
-        compressed_data = compression_data['compressed_data']
-        original_size = compression_data['original_size']
-        
-        # Decompress data
+            raw = f.read()
+
+        if raw[:4] == _BLOCK_MAGIC:
+            # Block container: parse the cheap per-block entries
+            # sequentially, then decode the independent token streams in
+            # parallel worker processes
+            _, original_size, window_size, lookahead_size, block_count = \
+                _BLOCK_HEADER.unpack_from(raw)
+            offset = _BLOCK_HEADER.size
+            blocks = []
+            for _ in range(block_count):
+                payload_len, raw_len = _BLOCK_ENTRY.unpack_from(raw, offset)
+                offset += _BLOCK_ENTRY.size
+                # Copies, not views: the payloads pickle into the workers
+                blocks.append(raw[offset:offset + payload_len])
+                offset += payload_len
+
+            # Spawn for the same reason as _compress_blocks
+            with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(blocks)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                decoded = list(pool.map(_decode_token_stream, blocks))
+
+            with open(output_file, 'wb') as f:
+                for part, _, _ in decoded:
+                    f.write(part)
+
+            tokens_processed = sum(tokens for _, tokens, _ in decoded)
+            matches_processed = sum(matches for _, _, matches in decoded)
+            decompressed_size = sum(len(part) for part, _, _ in decoded)
+            self.stats = {
+                'original_size': original_size,
+                'decompressed_size': decompressed_size,
+                'success': decompressed_size == original_size,
+                'triplets_processed': tokens_processed,
+                'matches_processed': matches_processed,
+                'literals_processed': tokens_processed - matches_processed
+            }
+            return self.stats
+
+        if raw[:4] == _MAGIC:
+            _, original_size, window_size, lookahead_size = _HEADER.unpack_from(raw)
+            # View, not copy: the token decoder only reads from it
+            compressed_data = memoryview(raw)[_HEADER.size:]
+            return self._decompress_tokens(compressed_data, original_size, output_file)
+
+        if raw[:4] == _LEGACY_MAGIC:
+            # Struct-framed archive from before the token format; the
+            # payload is the fixed 4-byte triplet stream
+            _, original_size, window_size, lookahead_size = _HEADER.unpack_from(raw)
+            compressed_data = memoryview(raw)[_HEADER.size:]
+            return self._decompress_payload(compressed_data, original_size, output_file)
+
+        raise ValueError(f"File {compressed_file} is not an LZ77 archive (bad magic)")
+
+    def _decompress_tokens(self, compressed_data, original_size: int,
+                           output_file: str) -> Dict[str, Any]:
+        """Decode the LZSS control-bit token stream, write the output
+        file and build stats"""
+        decompressed_data, tokens_processed, matches_processed = \
+            _decode_token_stream(compressed_data)
+
+        # Write decompressed file
+        with open(output_file, 'wb') as f:
+            f.write(bytes(decompressed_data))
+
+        decompressed_size = len(decompressed_data)
+        self.stats = {
+            'original_size': original_size,
+            'decompressed_size': decompressed_size,
+            'success': decompressed_size == original_size,
+            'triplets_processed': tokens_processed,
+            'matches_processed': matches_processed,
+            'literals_processed': tokens_processed - matches_processed
+        }
+
+        return self.stats
+
+    def _decompress_payload(self, compressed_data, original_size: int,
+                            output_file: str) -> Dict[str, Any]:
+        """Decode a legacy triplet stream, write the output file and build stats"""
         decompressed_data = bytearray()
         i = 0
         triplets_processed = 0
@@ -305,14 +737,23 @@ class LZ77Compressor:
                 
                 if start_pos < 0:
                     raise ValueError(f"Invalid distance reference: {distance} at position {len(decompressed_data)}")
-                
-                # Copy the match (byte by byte to handle overlapping matches)
-                for _ in range(length):
-                    if start_pos >= len(decompressed_data):
-                        raise ValueError("Distance reference beyond available data")
-                    decompressed_data.append(decompressed_data[start_pos])
-                    start_pos += 1
-                
+
+                # Copy the match with slice operations so the byte moves
+                # happen in C; overlap is handled by repeating the period
+                if distance == 1:
+                    # Run of the last byte (the most common overlap case)
+                    decompressed_data.extend(decompressed_data[-1:] * length)
+                elif distance >= length:
+                    # No overlap: a single memcpy-style slice copy
+                    decompressed_data.extend(decompressed_data[start_pos:start_pos + length])
+                else:
+                    # Overlapping match: the copied region is periodic in
+                    # the distance, so tile the period and trim
+                    period = bytes(decompressed_data[start_pos:])
+                    reps, rem = divmod(length, distance)
+                    decompressed_data.extend(period * reps)
+                    decompressed_data.extend(period[:rem])
+
                 # Add the next character
                 if next_char != 0 or i < len(compressed_data):  # Don't add null terminator at end
                     decompressed_data.append(next_char)
@@ -372,12 +813,15 @@ class LZ77Compressor:
         Returns:
             Analysis results with compression predictions
         """
+        # Same zero-copy mapping as compress: analysis is read-only
         with open(file_path, 'rb') as f:
-            data = f.read()
-        
-        if not data:
-            return {'error': 'File is empty'}
-        
+            if os.fstat(f.fileno()).st_size == 0:
+                return {'error': 'File is empty'}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self._analyze_buffer(data)
+
+    def _analyze_buffer(self, data) -> Dict[str, Any]:
+        """Analyze one readable buffer (bytes or mmap)"""
         file_size = len(data)
         
         # Sample analysis (analyze first portion for large files)
@@ -388,17 +832,53 @@ class LZ77Compressor:
         potential_matches = 0
         total_match_length = 0
         match_lengths = []
+
+        if njit is not None and sample_size >= 3:
+            # Estimate matches from 3-gram repetition density instead of
+            # running the full window search at every sample position:
+            # every occurrence of a repeated trigram after its first is a
+            # potential match start. Match lengths come from a handful of
+            # spot checks at repeated positions
+            arr = np.frombuffer(sample_data, dtype=np.uint8).astype(np.uint32)
+            tri = arr[:-2] | (arr[1:-1] << 8) | (arr[2:] << 16)
+            values, counts3 = np.unique(tri, return_counts=True)
+            potential_matches = int((counts3[counts3 > 1] - 1).sum())
+
+            if potential_matches:
+                repeated = np.isin(tri, values[counts3 > 1])
+                positions = np.flatnonzero(repeated)
+                step = max(1, positions.size // 32)
+                for pos in positions[::step][:32]:
+                    distance, length = self._find_longest_match(sample_data, int(pos))
+                    if distance > 0 and length > 0:
+                        match_lengths.append(length)
+                if match_lengths:
+                    average = sum(match_lengths) / len(match_lengths)
+                    total_match_length = int(average * potential_matches)
+        else:
+            for i in range(sample_size):
+                distance, length = self._find_longest_match(sample_data, i)
+                if distance > 0 and length > 0:
+                    potential_matches += 1
+                    total_match_length += length
+                    match_lengths.append(length)
         
-        for i in range(len(sample_data)):
-            distance, length = self._find_longest_match(sample_data, i)
-            if distance > 0 and length > 0:
-                potential_matches += 1
-                total_match_length += length
-                match_lengths.append(length)
-        
-        # Byte frequency analysis
-        byte_frequency = Counter(data)
-        entropy = self._calculate_entropy(byte_frequency, file_size)
+        # Byte frequency analysis: one C histogram pass and a vectorized
+        # entropy reduction when numpy is available
+        if njit is not None:
+            counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+            unique_bytes = int((counts > 0).sum())
+            probabilities = counts[counts > 0] / file_size
+            entropy = float(-(probabilities * np.log2(probabilities)).sum())
+            order = np.argsort(counts)[::-1][:5]
+            top_5 = [(int(b), int(counts[b])) for b in order if counts[b] > 0]
+        else:
+            # bytes(...) because iterating an mmap yields byte strings,
+            # not integers
+            byte_frequency = Counter(bytes(data))
+            unique_bytes = len(byte_frequency)
+            entropy = self._calculate_entropy(byte_frequency, file_size)
+            top_5 = byte_frequency.most_common(5)
         
         # Pattern analysis
         repeated_patterns = self._find_common_patterns(data[:sample_size])
@@ -406,7 +886,7 @@ class LZ77Compressor:
         return {
             'file_size': file_size,
             'sample_analyzed': sample_size,
-            'unique_bytes': len(byte_frequency),
+            'unique_bytes': unique_bytes,
             'entropy': entropy,
             'potential_matches': potential_matches,
             'estimated_match_ratio': potential_matches / sample_size if sample_size > 0 else 0,
@@ -419,7 +899,7 @@ class LZ77Compressor:
                     'count': c,
                     'percentage': (c / file_size) * 100
                 }
-                for b, c in byte_frequency.most_common(5)
+                for b, c in top_5
             ],
             'common_patterns': repeated_patterns,
             'recommendation': self._get_recommendation(potential_matches, sample_size, entropy)
@@ -438,15 +918,48 @@ class LZ77Compressor:
         return entropy
     
     def _find_common_patterns(self, data: bytes, min_length: int = 4, max_patterns: int = 5) -> List[Dict]:
-        """Find common repeated patterns in data"""
+        """
+        Find common repeated patterns in data
+
+        Packs every fixed-size window into one integer with a vectorized
+        rolling view and buckets them through a single np.unique sort,
+        instead of hashing every slice of every length into a Counter.
+        Windows of min_length and 8 bytes are counted (both fit uint64).
+        """
+        if njit is not None and len(data) >= min_length:
+            arr = np.frombuffer(data, dtype=np.uint8)
+            candidates = []
+            for length in {min_length, min(8, len(data))}:
+                windows = arr.size - length + 1
+                packed = np.zeros(windows, dtype=np.uint64)
+                for k in range(length):
+                    packed = (packed << 8) | arr[k:windows + k].astype(np.uint64)
+                values, counts = np.unique(packed, return_counts=True)
+                order = np.argsort(counts)[::-1][:max_patterns]
+                candidates.extend(
+                    (int(counts[idx]), length, int(values[idx]).to_bytes(length, 'big'))
+                    for idx in order if counts[idx] > 1
+                )
+
+            common_patterns = []
+            for count, length, pattern in sorted(candidates, reverse=True)[:max_patterns]:
+                readable = ''.join(chr(b) if 32 <= b <= 126 else f'\\x{b:02x}' for b in pattern)
+                common_patterns.append({
+                    'pattern': readable,
+                    'length': length,
+                    'occurrences': count,
+                    'bytes_saved': (length - 4) * (count - 1)  # Estimate bytes saved
+                })
+            return common_patterns
+
         patterns = Counter()
-        
+
         # Look for patterns of different lengths
         for length in range(min_length, min(20, len(data) // 4)):
             for i in range(len(data) - length + 1):
                 pattern = data[i:i + length]
                 patterns[pattern] += 1
-        
+
         # Return most common patterns
         common_patterns = []
         for pattern, count in patterns.most_common(max_patterns):
@@ -459,7 +972,7 @@ class LZ77Compressor:
                     'occurrences': count,
                     'bytes_saved': (len(pattern) - 4) * (count - 1)  # Estimate bytes saved
                 })
-        
+
         return common_patterns
     
     def _estimate_compression_ratio(self, matches: int, match_length: int, sample_size: int) -> float:
@@ -489,8 +1002,74 @@ class LZ77Compressor:
         else:
             return "LZ77 highly recommended - excellent pattern repetition detected"
 
+def _decode_token_stream(compressed_data) -> Tuple[bytearray, int, int]:
+    """
+    Decode one LZSS control-bit token stream
+
+    Module-level so it pickles into worker processes for block
+    containers. Returns (decoded bytes, token count, match count).
+    """
+    decompressed_data = bytearray()
+    i = 0
+    n = len(compressed_data)
+    tokens_processed = 0
+    matches_processed = 0
+
+    while i < n:
+        ctrl = compressed_data[i]
+        i += 1
+        for bit in range(8):
+            if i >= n:
+                break
+            if ctrl & (1 << bit):
+                if i + 3 > n:
+                    raise ValueError("Incomplete match token")
+                distance = (compressed_data[i] << 8) | compressed_data[i + 1]
+                length = compressed_data[i + 2] + 3
+                i += 3
+                matches_processed += 1
+                start_pos = len(decompressed_data) - distance
+
+                if start_pos < 0:
+                    raise ValueError(f"Invalid distance reference: {distance} at position {len(decompressed_data)}")
+
+                # Same C-level copy dispatch as the triplet decoder
+                if distance == 1:
+                    decompressed_data.extend(decompressed_data[-1:] * length)
+                elif distance >= length:
+                    decompressed_data.extend(decompressed_data[start_pos:start_pos + length])
+                else:
+                    period = bytes(decompressed_data[start_pos:])
+                    reps, rem = divmod(length, distance)
+                    decompressed_data.extend(period * reps)
+                    decompressed_data.extend(period[:rem])
+            else:
+                # Literal byte
+                decompressed_data.append(compressed_data[i])
+                i += 1
+            tokens_processed += 1
+
+    return decompressed_data, tokens_processed, matches_processed
+
+def _compress_block(args: Tuple[bytes, int, int]) -> Tuple[bytes, int, int, int, int]:
+    """
+    Compress one block into an encoded token stream
+
+    Module-level so it pickles into worker processes. args is a
+    (chunk, window_size, lookahead_size) tuple; returns the payload and
+    the per-block stats (token count, matches found, total match
+    length, saved bytes).
+    """
+    chunk, window_size, lookahead_size = args
+    compressor = LZ77Compressor(window_size=window_size, lookahead_size=lookahead_size)
+    triplets = compressor._compress_data(chunk)
+    payload = compressor._encode_tokens(triplets)
+    return (payload, len(triplets), compressor.stats['matches_found'],
+            compressor.stats['total_match_length'], compressor.stats['saved_bytes'])
+
 def compress_file_LZ77(input_path: str, output_path: str = None, 
-                      window_size: int = 4096, lookahead_size: int = 18) -> Dict[str, Any]:
+                      window_size: int = 4096, lookahead_size: int = 18,
+                      return_data: bool = False) -> Dict[str, Any]:
     """
     Convenience function to compress any file using LZ77
     
@@ -499,6 +1078,7 @@ def compress_file_LZ77(input_path: str, output_path: str = None,
         output_path: Output path (optional)
         window_size: Sliding window size
         lookahead_size: Maximum match length
+        return_data: Include the serialized output bytes in the stats
     
     Returns:
         Compression statistics
@@ -507,7 +1087,7 @@ def compress_file_LZ77(input_path: str, output_path: str = None,
         output_path = input_path + '.lz77'
     
     compressor = LZ77Compressor(window_size=window_size, lookahead_size=lookahead_size)
-    stats = compressor.compress(input_path, output_path)
+    stats = compressor.compress(input_path, output_path, return_data=return_data)
     compression_info = compressor.get_compression_info()
     
     return {**stats, 'compression_info': compression_info}
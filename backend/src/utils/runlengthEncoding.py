@@ -1,8 +1,230 @@
-import pickle
+import gc
+import mmap
 import os
+import struct
 from collections import Counter
 from typing import Dict, Tuple, Any, List
 
+try:
+    import numpy as np
+    from numba import njit, prange, types
+except ImportError:  # numba/numpy are optional; fall back to pure Python
+    njit = None
+
+# compress reads and encodes the input this many bytes at a time, so
+# peak memory is bounded by the chunk rather than the file
+_CHUNK_SIZE = 16 * 1024 * 1024
+
+# How many chunks the parallel encoder keeps in flight at once; bounds
+# the transient output-buffer allocation to a few chunk-sized rows
+_PARALLEL_BATCH = 4
+
+# Files larger than this are analyzed from evenly spaced sample windows
+# instead of a full scan (see analyze_file)
+_SAMPLE_THRESHOLD = 64 * 1024 * 1024
+_SAMPLE_WINDOWS = 64
+_SAMPLE_WINDOW_SIZE = 64 * 1024
+
+# Container layout: magic, version, threshold, original size, run
+# count, literal segment count, then the raw encoded stream
+_MAGIC = b'RLE1'
+_HEADER = struct.Struct('<4sBBQII')
+
+# Variable-length run/length codec: one byte below 255, otherwise an
+# escape byte and a little-endian u16, with u16 0xFFFF escaping in turn
+# to a u32. Escaping on the full u16 (not its low byte) means lengths
+# whose low byte happens to be 0xFF are no longer ambiguous
+_LEN2 = struct.Struct('<BH')
+_LEN4 = struct.Struct('<BHI')
+
+# Every 1-byte value, built once; materializing a single byte is then a
+# tuple lookup instead of a bytes construction per call
+_BYTE = tuple(bytes((i,)) for i in range(256))
+
+def _close_mmap(mm):
+    """Close mm, collecting first if a stray view still references it.
+
+    The first call into a freshly compiled numba kernel can leave a
+    cycle-held view of the map alive until the next GC pass; collect
+    and retry rather than leaking the mapping.
+    """
+    try:
+        mm.close()
+    except BufferError:
+        gc.collect()
+        mm.close()
+
+def _run_boundaries(arr):
+    """Locate every maximal run in arr.
+
+    A value change at position i means a run starts there, so one
+    vectorized inequality pass over adjacent elements yields every run
+    at once. Returns (starts, lengths) as int64 arrays.
+    """
+    change = np.flatnonzero(arr[1:] != arr[:-1]) + 1
+    starts = np.concatenate((np.zeros(1, dtype=np.int64), change))
+    ends = np.concatenate((change, np.array([arr.size], dtype=np.int64)))
+    return starts, ends - starts
+
+if njit is not None:
+    # Eagerly typed signatures: the serial kernels compile once at
+    # import time (and persist on disk via cache=True) instead of
+    # paying the LLVM compile tax on the first compress or decompress
+    # call. np.frombuffer over an mmap or bytes yields readonly arrays,
+    # so the input side is typed readonly
+    _U1 = types.uint8[::1]
+    _U1_RO = types.Array(types.uint8, 1, 'C', readonly=True)
+    _I8 = types.int64
+
+    @njit(_I8(_U1, _I8, _I8), cache=True)
+    def _put_length(out, pos, length):  # pragma: no cover - compiled
+        """Write the variable-length count codec; returns the new pos."""
+        if length < 255:
+            out[pos] = length
+            return pos + 1
+        out[pos] = 255
+        if length < 65535:
+            out[pos + 1] = length & 0xFF
+            out[pos + 2] = (length >> 8) & 0xFF
+            return pos + 3
+        out[pos + 1] = 0xFF
+        out[pos + 2] = 0xFF
+        out[pos + 3] = length & 0xFF
+        out[pos + 4] = (length >> 8) & 0xFF
+        out[pos + 5] = (length >> 16) & 0xFF
+        out[pos + 6] = (length >> 24) & 0xFF
+        return pos + 7
+
+    @njit(types.UniTuple(_I8, 4)(_U1_RO, _U1, _I8), cache=True)
+    def _encode_stream(arr, out, threshold):  # pragma: no cover - compiled
+        """Fused run scan + segment serialization for one chunk.
+
+        Walks arr once and writes the framed segments (flag, count,
+        payload) straight into out, so the data never leaves cache
+        between scan and emit and no intermediate run list is built.
+        out must hold the worst case of 3 * len(arr) + 16 bytes.
+        Returns (written, runs, literals, run_bytes).
+        """
+        n = arr.shape[0]
+        i = 0
+        pos = 0
+        runs = 0
+        literals = 0
+        run_bytes = 0
+        lit_start = -1
+        while i < n:
+            v = arr[i]
+            j = i + 1
+            while j < n and arr[j] == v:
+                j += 1
+            if j - i >= threshold:
+                if lit_start >= 0:
+                    out[pos] = 0xFE
+                    pos = _put_length(out, pos + 1, i - lit_start)
+                    out[pos:pos + (i - lit_start)] = arr[lit_start:i]
+                    pos += i - lit_start
+                    literals += 1
+                    lit_start = -1
+                out[pos] = 0xFF
+                pos = _put_length(out, pos + 1, j - i)
+                out[pos] = v
+                pos += 1
+                runs += 1
+                run_bytes += j - i
+            elif lit_start < 0:
+                lit_start = i
+            i = j
+        if lit_start >= 0:
+            out[pos] = 0xFE
+            pos = _put_length(out, pos + 1, n - lit_start)
+            out[pos:pos + (n - lit_start)] = arr[lit_start:n]
+            pos += n - lit_start
+            literals += 1
+        return pos, runs, literals, run_bytes
+
+    # Deliberately lazy (no eager signature): compiling a
+    # parallel=True kernel initializes numba's threading layer, and
+    # doing that at import leaves forked worker processes (the block
+    # pools in huffman_coding/lz77, serve's pool) hanging at shutdown.
+    # Only processes that actually hit the multi-chunk path pay the
+    # one-time compile, still amortized via cache=True
+    @njit(parallel=True, cache=True)
+    def _encode_parallel(arr, starts, ends, out_bufs, stats, threshold):  # pragma: no cover - compiled
+        """Encode several run-aligned chunks concurrently.
+
+        Each prange iteration runs the fused _encode_stream over its
+        chunk into its own row of out_bufs; stats row k receives
+        (written, runs, literals, run_bytes). The encoded streams are
+        self-delimiting, so concatenating the rows in order yields the
+        same format the serial path produces.
+        """
+        for k in prange(starts.shape[0]):
+            written, runs, literals, run_bytes = _encode_stream(
+                arr[starts[k]:ends[k]], out_bufs[k], threshold)
+            stats[k, 0] = written
+            stats[k, 1] = runs
+            stats[k, 2] = literals
+            stats[k, 3] = run_bytes
+
+    @njit(types.UniTuple(_I8, 4)(_U1_RO, _U1), cache=True)
+    def _decode_stream(buf, out):  # pragma: no cover - compiled
+        """Decode one RLE stream into the preallocated out array.
+
+        A single cursor walk in machine code: runs become vector fills
+        and literals memcpy-style slice copies, with the variable-length
+        codec decoded inline. Every input read is bounds-checked
+        explicitly — the compiled code has no implicit IndexError, and a
+        truncated or crafted stream must fail instead of reading past
+        the buffer. Returns (written, runs, literals, bad) where bad is
+        the offset of the invalid or truncated portion, or -1 on
+        success.
+        """
+        n = buf.shape[0]
+        size = out.shape[0]
+        i = 0
+        pos = 0
+        runs = 0
+        literals = 0
+        while i < n:
+            flag = buf[i]
+            i += 1
+            if flag != 0xFF and flag != 0xFE:
+                return pos, runs, literals, i - 1
+            if i >= n:
+                return pos, runs, literals, i - 1
+            marker = buf[i]
+            if marker < 255:
+                length = int(marker)
+                i += 1
+            else:
+                if i + 3 > n:
+                    return pos, runs, literals, i
+                length = buf[i + 1] + buf[i + 2] * 256
+                if length < 65535:
+                    i += 3
+                else:
+                    if i + 7 > n:
+                        return pos, runs, literals, i
+                    length = (buf[i + 3] + buf[i + 4] * 256
+                              + buf[i + 5] * 65536 + buf[i + 6] * 16777216)
+                    i += 7
+            if pos + length > size:
+                return pos, runs, literals, i - 1
+            if flag == 0xFF:
+                if i >= n:
+                    return pos, runs, literals, i - 1
+                out[pos:pos + length] = buf[i]
+                i += 1
+                runs += 1
+            else:
+                if i + length > n:
+                    return pos, runs, literals, i - 1
+                out[pos:pos + length] = buf[i:i + length]
+                i += length
+                literals += 1
+            pos += length
+        return pos, runs, literals, -1
+
 class RLECompressor:
     """
     Run-Length Encoding (RLE) Compression Algorithm
@@ -30,6 +252,10 @@ class RLECompressor:
     Note: RLE can actually increase file size if data has few consecutive repetitions
     """
     
+    # Single-byte length encodings: the dominant short case is a
+    # lookup into the shared single-byte table
+    _LEN1_TABLE = _BYTE[:255]
+    
     def __init__(self, threshold: int = 3):
         """
         Initialize RLE compressor
@@ -41,7 +267,7 @@ class RLECompressor:
         self.threshold = threshold
         self.stats = {}
     
-    def _encode_runs(self, data: bytes) -> List[Tuple[bool, int, bytes]]:
+    def _encode_runs(self, data: bytes) -> List[Tuple[bool, int, memoryview]]:
         """
         Encode data into runs
         
@@ -49,11 +275,14 @@ class RLECompressor:
             List of tuples: (is_compressed, length, data)
             - is_compressed: True if this segment is RLE compressed
             - length: Length of the run or literal segment
-            - data: The actual byte value (for runs) or literal data
+            - data: Buffer view of the byte value (for runs) or literal
+              data. Views, not copies: the bytes are only materialized
+              when the segment is serialized
         """
         if not data:
             return []
         
+        view = memoryview(data)
         runs = []
         i = 0
         
@@ -67,7 +296,7 @@ class RLECompressor:
             
             if run_length >= self.threshold:
                 # Store as compressed run: (True, count, byte_value)
-                runs.append((True, run_length, bytes([current_byte])))
+                runs.append((True, run_length, view[i:i + 1]))
                 i += run_length
             else:
                 # Collect literal bytes (non-repeating or short runs)
@@ -88,55 +317,108 @@ class RLECompressor:
                     
                     i += next_run_length
                 
-                # Store literal segment
-                literal_data = data[literal_start:i]
-                runs.append((False, len(literal_data), literal_data))
+                # Store literal segment (view, not copy)
+                runs.append((False, i - literal_start, view[literal_start:i]))
         
         return runs
     
-    def _encode_to_bytes(self, runs: List[Tuple[bool, int, bytes]]) -> bytes:
+    def _chunk_bounds(self, arr, size: int) -> List[int]:
+        """
+        Run-aligned chunk boundaries over a uint8 array
+        
+        Each _CHUNK_SIZE boundary is pushed past every byte equal to
+        the one before it so no run or literal is split across chunks;
+        a run longer than a whole further chunk is cut anyway to keep
+        chunk sizes bounded (the split still decodes identically).
+        """
+        bounds = [0]
+        end = 0
+        while end < size:
+            end = min(end + _CHUNK_SIZE, size)
+            if end < size:
+                v = arr[end - 1]
+                probe = arr[end:min(end + _CHUNK_SIZE, size)]
+                nxt = np.flatnonzero(probe != v)
+                end += int(nxt[0]) if nxt.size else probe.size
+            bounds.append(end)
+        return bounds
+    
+    def _encode_chunk(self, out: bytearray, data) -> Tuple[int, int, int]:
         """
-        Convert run data to byte format for storage
+        Encode one chunk of input and append its framed segments to out
         
-        Format:
+        data is a uint8 array view of the chunk when numba is available
+        (the scan and the serialization then run fused in a single
+        compiled pass writing straight into a preallocated buffer) and a
+        memoryview otherwise, feeding the pure-Python run encoder.
+        
+        Returns:
+            Tuple of (runs, literals, run_bytes) emitted
+        """
+        if njit is not None:
+            # Worst case is threshold 1 over non-repeating input: a
+            # 3-byte frame per input byte
+            buf = np.empty(3 * data.size + 16, dtype=np.uint8)
+            written, runs, literals, run_bytes = _encode_stream(
+                data, buf, self.threshold)
+            out += buf[:written].data
+            return runs, literals, run_bytes
+        return self._emit_segments(out, self._encode_runs(data))
+    
+    def _emit_segments(self, out: bytearray,
+                       segments: List[Tuple[bool, int, Any]]) -> Tuple[int, int, int]:
+        """
+        Append a batch of framed segments to the output stream
+        
+        Format per segment:
         - Compressed run: [FLAG_COMPRESSED][COUNT_BYTES][VALUE]
         - Literal segment: [FLAG_LITERAL][LENGTH_BYTES][LITERAL_DATA]
         
-        Uses variable-length encoding for counts/lengths
+        The exact serialized size of the batch is computed up front so
+        the bytearray grows once per batch instead of reallocating
+        geometrically segment by segment
+        
+        Returns:
+            Tuple of (runs, literals, run_bytes) emitted
         """
-        result = bytearray()
-        
-        for is_compressed, length, data in runs:
-            if is_compressed:
-                # Compressed run format: 0xFF (flag) + count + value
-                result.append(0xFF)  # Compression flag
-                result.extend(self._encode_length(length))
-                result.extend(data)
+        encoded = [(is_comp, self._encode_length(length), length, payload)
+                   for is_comp, length, payload in segments]
+        total = sum(1 + len(lenbuf) + len(payload)
+                    for _, lenbuf, _, payload in encoded)
+        pos = len(out)
+        out.extend(bytes(total))
+        runs = literals = run_bytes = 0
+        for is_comp, lenbuf, length, payload in encoded:
+            out[pos] = 0xFF if is_comp else 0xFE
+            pos += 1
+            end = pos + len(lenbuf)
+            out[pos:end] = lenbuf
+            pos = end
+            end = pos + len(payload)
+            out[pos:end] = payload
+            pos = end
+            if is_comp:
+                runs += 1
+                run_bytes += length
             else:
-                # Literal segment format: 0xFE (flag) + length + data
-                result.append(0xFE)  # Literal flag
-                result.extend(self._encode_length(length))
-                result.extend(data)
-        
-        return bytes(result)
+                literals += 1
+        return runs, literals, run_bytes
     
     def _encode_length(self, length: int) -> bytes:
         """
         Encode length using variable-length encoding
         
-        Uses 1-4 bytes depending on value:
+        Uses 1-7 bytes depending on value:
         - 0-254: 1 byte
-        - 255-65534: 2 bytes (255 + 2 bytes)
-        - 65535+: 4 bytes (255 + 255 + 4 bytes)
+        - 255-65534: 3 bytes (255 escape + u16)
+        - 65535+: 7 bytes (255 + 65535 escapes + u32)
         """
         if length < 255:
-            return bytes([length])
+            return self._LEN1_TABLE[length]
         elif length < 65535:
-            return bytes([255, length & 0xFF, (length >> 8) & 0xFF])
+            return _LEN2.pack(255, length)
         else:
-            return bytes([255, 255, 
-                         length & 0xFF, (length >> 8) & 0xFF,
-                         (length >> 16) & 0xFF, (length >> 24) & 0xFF])
+            return _LEN4.pack(255, 65535, length)
     
     def _decode_length(self, data: bytes, offset: int) -> Tuple[int, int]:
         """
@@ -147,61 +429,127 @@ class RLECompressor:
         """
         if data[offset] < 255:
             return data[offset], 1
-        elif data[offset + 1] < 255:
-            length = data[offset + 1] | (data[offset + 2] << 8)
-            return length, 3
-        else:
-            length = (data[offset + 2] | (data[offset + 3] << 8) |
-                     (data[offset + 4] << 16) | (data[offset + 5] << 24))
-            return length, 6
+        
+        length = _LEN2.unpack_from(data, offset)[1]
+        if length < 65535:
+            return length, _LEN2.size
+        return _LEN4.unpack_from(data, offset)[2], _LEN4.size
     
-    def compress(self, input_file: str, output_file: str) -> Dict[str, Any]:
+    def compress(self, input_file: str, output_file: str, return_data: bool = False) -> Dict[str, Any]:
         """
         Compress a file using Run-Length Encoding
         
         Args:
             input_file: Path to input file
             output_file: Path to compressed output file
+            return_data: Include the serialized output bytes in the stats
+                         so callers can avoid re-reading the file from disk
             
         Returns:
             Dictionary with compression statistics
         """
-        # Read input file
+        # Map rather than read: the kernel pages the file in on demand
+        # and the scan reads it zero-copy, with no file-sized bytes
+        # buffered in the process
         with open(input_file, 'rb') as f:
-            data = f.read()
-        
-        if not data:
-            raise ValueError("Input file is empty")
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Input file is empty")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return self._compress_buffer(data, output_file, return_data)
+        finally:
+            _close_mmap(data)
+    
+    def _compress_buffer(self, data, output_file: str,
+                         return_data: bool) -> Dict[str, Any]:
+        """
+        Encode one readable buffer (the mapped input file) to output_file
         
+        The buffer is encoded in _CHUNK_SIZE pieces so the serialized
+        stream grows in bounded steps, with each boundary pushed forward
+        to the end of the run containing it so no run or literal is ever
+        split across chunks.
+        """
         original_size = len(data)
+        out = bytearray()
+        total_runs = 0
+        total_literals = 0
+        total_run_bytes = 0
+        
+        if njit is not None:
+            # View, not copy; one bincount pass builds the whole byte
+            # histogram instead of hashing every byte through a Counter
+            arr = np.frombuffer(data, dtype=np.uint8)
+            byte_hist = np.bincount(arr, minlength=256)
+            bounds = self._chunk_bounds(arr, original_size)
+            
+            if len(bounds) == 2:
+                total_runs, total_literals, total_run_bytes = \
+                    self._encode_chunk(out, arr)
+            else:
+                # Chunks are independent once the boundaries are
+                # run-aligned, so batches of them encode concurrently
+                # in the prange driver
+                starts = np.array(bounds[:-1], dtype=np.int64)
+                ends = np.array(bounds[1:], dtype=np.int64)
+                # 3 bytes per input byte only happens below threshold
+                # 3; above it the frame overhead cannot reach 2x
+                factor = 3 if self.threshold < 3 else 2
+                for b in range(0, starts.size, _PARALLEL_BATCH):
+                    s = starts[b:b + _PARALLEL_BATCH]
+                    e = ends[b:b + _PARALLEL_BATCH]
+                    width = factor * int((e - s).max()) + 16
+                    bufs = np.empty((s.size, width), dtype=np.uint8)
+                    stats = np.zeros((s.size, 4), dtype=np.int64)
+                    _encode_parallel(arr, s, e, bufs, stats, self.threshold)
+                    for k in range(s.size):
+                        out += bufs[k, :stats[k, 0]].data
+                        total_runs += int(stats[k, 1])
+                        total_literals += int(stats[k, 2])
+                        total_run_bytes += int(stats[k, 3])
+        else:
+            # Iterating a memoryview yields ints (an mmap would yield
+            # 1-byte bytes objects)
+            mv = memoryview(data)
+            byte_counts = Counter(mv)
+            
+            off = 0
+            while off < original_size:
+                end = min(off + _CHUNK_SIZE, original_size)
+                if end < original_size:
+                    # Run-align the boundary: extend end past every
+                    # byte equal to the one before it, chasing at most
+                    # one further chunk (same cap as _chunk_bounds)
+                    v = mv[end - 1]
+                    limit = min(end + _CHUNK_SIZE, original_size)
+                    while end < limit and mv[end] == v:
+                        end += 1
+                
+                runs, literals, run_bytes = self._encode_chunk(out, mv[off:end])
+                total_runs += runs
+                total_literals += literals
+                total_run_bytes += run_bytes
+                off = end
+        
+        compressed_data = bytes(out)
+        
+        if njit is not None:
+            unique_bytes = int((byte_hist > 0).sum())
+            most_common_idx = int(byte_hist.argmax())
+            most_common_byte = (most_common_idx, int(byte_hist[most_common_idx]))
+        else:
+            unique_bytes = len(byte_counts)
+            most_common_byte = byte_counts.most_common(1)[0] if byte_counts else None
         
-        # Analyze data for statistics
-        byte_counts = Counter(data)
-        
-        # Encode into runs
-        runs = self._encode_runs(data)
-        
-        # Convert to bytes
-        compressed_data = self._encode_to_bytes(runs)
-        
-        # Calculate statistics
-        total_runs = sum(1 for is_comp, _, _ in runs if is_comp)
-        total_literals = sum(1 for is_comp, _, _ in runs if not is_comp)
-        total_run_bytes = sum(length for is_comp, length, _ in runs if is_comp)
-        
-        # Save compressed file with metadata
-        compression_data = {
-            'compressed_data': compressed_data,
-            'original_size': original_size,
-            'threshold': self.threshold,
-            'runs_count': total_runs,
-            'literal_segments': total_literals
-        }
-        
+        # Save with fixed struct framing: header, then the encoded
+        # stream as-is (no pickle copy of the payload)
+        header = _HEADER.pack(_MAGIC, 1, self.threshold, original_size,
+                              total_runs, total_literals)
         with open(output_file, 'wb') as f:
-            pickle.dump(compression_data, f)
+            f.write(header)
+            f.write(compressed_data)
         
-        compressed_size = os.path.getsize(output_file)
+        compressed_size = len(header) + len(compressed_data)
         compression_ratio = original_size / compressed_size if compressed_size > 0 else 0
         
         self.stats = {
@@ -212,10 +560,12 @@ class RLECompressor:
             'total_runs': total_runs,
             'total_literals': total_literals,
             'run_bytes_saved': total_run_bytes - (total_runs * 3),  # Approximate overhead
-            'unique_bytes': len(byte_counts),
-            'most_common_byte': byte_counts.most_common(1)[0] if byte_counts else None
+            'unique_bytes': unique_bytes,
+            'most_common_byte': most_common_byte
         }
         
+        if return_data:
+            return {**self.stats, 'compressed_data': header + compressed_data}
         return self.stats
     
     def decompress(self, compressed_file: str, output_file: str) -> Dict[str, Any]:
@@ -227,56 +577,67 @@ class RLECompressor:
         Returns:
             Dictionary with decompression statistics
         """
-        # Check if file is actually an RLE-compressed file
+        # Load compressed data
         with open(compressed_file, 'rb') as f:
-            header = f.read(10)
+            raw = f.read()
+        
+        # The magic replaces the old PNG/JPEG/pickle sniffing: anything
+        # that is not an RLE archive fails the same check
+        if raw[:4] != _MAGIC:
+            raise ValueError(f"File {compressed_file} is not an RLE archive (bad magic)")
+        
+        _, version, threshold, original_size, runs_count, literal_segments = \
+            _HEADER.unpack_from(raw)
+        # View, not copy: the decode loop only reads from it
+        compressed_data = memoryview(raw)[_HEADER.size:]
+        
+        # Preallocate the output at its known final size; a run then
+        # becomes one slice assignment of a repeated single byte and a
+        # literal one memcpy-style slice copy. With numba the whole
+        # cursor walk runs as a compiled kernel instead of dispatching
+        # each flag through the Python loop
+        if njit is not None:
+            buf = np.frombuffer(raw, dtype=np.uint8)[_HEADER.size:]
+            out_arr = np.empty(original_size, dtype=np.uint8)
+            out_pos, actual_runs, actual_literals, bad = _decode_stream(buf, out_arr)
+            if bad >= 0:
+                raise ValueError(
+                    f"Invalid or truncated RLE stream at position {bad}")
+            decoded_data = out_arr[:out_pos].tobytes()
+        else:
+            decoded_data = bytearray(original_size)
+            out_pos = 0
+            i = 0
+            actual_runs = 0
+            actual_literals = 0
             
-        # Check for PNG signature
-        if header.startswith(b'\x89PNG'):
-            raise ValueError(f"File {compressed_file} is a PNG image, not an RLE-compressed file")
-        
-        # Check for other common file types
-        if header.startswith(b'JFIF') or header.startswith(b'\xff\xd8'):
-            raise ValueError(f"File {compressed_file} is a JPEG image, not an RLE-compressed file")
-        
-        # Check for pickle protocol headers
-        if not (header.startswith(b'\x80\x03') or header.startswith(b'\x80\x04') or header.startswith(b'\x80\x05')):
-            raise ValueError(f"File {compressed_file} does not appear to be a pickle file (expected RLE format)")
-        
-        # Continue with your existing decompression logic...
-        with open(compressed_file, 'rb') as f:
-            unpickler = pickle.Unpickler(f)
-            unpickler.persistent_load = self.persistent_load
-            compression_data = unpickler.load()
-        
-        compressed_data = compression_data['compressed_data']
-        original_size = compression_data['original_size']
-        
-        # Rest of your decompression logic remains the same...
-        decoded_data = bytearray()
-        i = 0
-        actual_runs = 0
-        actual_literals = 0
-        
-        while i < len(compressed_data):
-            flag = compressed_data[i]
-            i += 1
-            if flag == 0xFF:  # Compressed run
-                length, consumed = self._decode_length(compressed_data, i)
-                i += consumed
-                value = compressed_data[i]
+            while i < len(compressed_data):
+                flag = compressed_data[i]
                 i += 1
-                decoded_data.extend([value] * length)
-                actual_runs += 1
-            elif flag == 0xFE:  # Literal segment
-                length, consumed = self._decode_length(compressed_data, i)
-                i += consumed
-                literal_data = compressed_data[i:i + length]
-                i += length
-                decoded_data.extend(literal_data)
-                actual_literals += 1
-            else:
-                raise ValueError(f"Invalid flag byte: {flag:02x} at position {i-1}")
+                if flag == 0xFF:  # Compressed run
+                    length, consumed = self._decode_length(compressed_data, i)
+                    i += consumed
+                    value = compressed_data[i]
+                    i += 1
+                    decoded_data[out_pos:out_pos + length] = _BYTE[value] * length
+                    out_pos += length
+                    actual_runs += 1
+                elif flag == 0xFE:  # Literal segment
+                    length, consumed = self._decode_length(compressed_data, i)
+                    i += consumed
+                    if i + length > len(compressed_data):
+                        # Slicing would silently clip a truncated stream
+                        raise ValueError(
+                            f"Invalid or truncated RLE stream at position {i}")
+                    decoded_data[out_pos:out_pos + length] = compressed_data[i:i + length]
+                    out_pos += length
+                    i += length
+                    actual_literals += 1
+                else:
+                    raise ValueError(f"Invalid flag byte: {flag:02x} at position {i-1}")
+            
+            # Trim in case the stream decoded short of the recorded size
+            del decoded_data[out_pos:]
         
         # Write decompressed file
         with open(output_file, 'wb') as f:
@@ -316,64 +677,124 @@ class RLECompressor:
         
         return info
     
-    def analyze_file(self, file_path: str) -> Dict[str, Any]:
+    def analyze_file(self, file_path: str, deep: bool = False) -> Dict[str, Any]:
         """
         Analyze a file to predict RLE compression effectiveness
         
         Args:
             file_path: Path to file to analyze
+            deep: Scan every byte regardless of size. By default files
+                  over 64 MB are estimated from 64 evenly spaced 64 KB
+                  sample windows, which bounds analysis time while
+                  keeping the estimate statistically sound
             
         Returns:
             Analysis results with compression predictions
         """
-        with open(file_path, 'rb') as f:
-            data = f.read()
-        
-        if not data:
+        file_size = os.path.getsize(file_path)
+        if file_size == 0:
             return {'error': 'File is empty'}
         
-        # Find all runs of different lengths
-        run_analysis = {i: 0 for i in range(2, 11)}  # Runs of length 2-10
-        run_analysis['11+'] = 0
-        
-        i = 0
-        total_compressible_bytes = 0
-        
-        while i < len(data):
-            current_byte = data[i]
-            run_length = 1
+        with open(file_path, 'rb') as f:
+            if deep or file_size <= _SAMPLE_THRESHOLD:
+                # Map rather than read: the scan streams the pages once
+                # without a file-sized bytes copy
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    return self._analyze_windows([data], file_size)
+                finally:
+                    _close_mmap(data)
             
-            while i + run_length < len(data) and data[i + run_length] == current_byte:
-                run_length += 1
+            # Stratified sample: evenly spaced windows cover the whole
+            # file without reading more than a few megabytes
+            step = (file_size - _SAMPLE_WINDOW_SIZE) // (_SAMPLE_WINDOWS - 1)
+            windows = []
+            for k in range(_SAMPLE_WINDOWS):
+                f.seek(k * step)
+                windows.append(f.read(_SAMPLE_WINDOW_SIZE))
+            return self._analyze_windows(windows, file_size)
+    
+    def _analyze_windows(self, windows: List, file_size: int) -> Dict[str, Any]:
+        """
+        Build the analysis dict from sample windows (or the whole
+        mapped file passed as a single window)
+        
+        Counts observed in the sample are scaled back up to the whole
+        file (scale is 1.0 for a full scan).
+        """
+        scale = file_size / sum(len(w) for w in windows)
+        
+        # Find all runs of different lengths: the same boundary diff
+        # the encoder uses yields every run length, and one clipped
+        # bincount builds the whole distribution. Byte frequencies come
+        # from the same pass
+        if njit is not None:
+            counts = np.zeros(12, dtype=np.int64)
+            byte_hist = np.zeros(256, dtype=np.int64)
+            total_compressible_bytes = 0
+            for w in windows:
+                arr = np.frombuffer(w, dtype=np.uint8)
+                lengths = _run_boundaries(arr)[1]
+                counts += np.bincount(np.minimum(lengths, 11), minlength=12)
+                total_compressible_bytes += int(
+                    lengths[lengths >= max(self.threshold, 2)].sum()
+                )
+                byte_hist += np.bincount(arr, minlength=256)
+            run_analysis = {i: int(round(counts[i] * scale)) for i in range(2, 11)}
+            run_analysis['11+'] = int(round(counts[11] * scale))
+            unique_bytes = int((byte_hist > 0).sum())
+            order = np.argsort(byte_hist)[::-1][:5]
+            top_5 = [(int(b), int(round(byte_hist[b] * scale)))
+                     for b in order if byte_hist[b] > 0]
+        else:
+            # Flat bucket list indexed by clipped run length; the dict
+            # keyed by length is only materialized once the scan is done
+            run_counts = [0] * 12
+            byte_frequency = Counter()
+            total_compressible_bytes = 0
             
-            if run_length >= 2:
-                if run_length <= 10:
-                    run_analysis[run_length] += 1
-                else:
-                    run_analysis['11+'] += 1
-                
-                if run_length >= self.threshold:
-                    total_compressible_bytes += run_length
+            for w in windows:
+                # memoryview so iteration yields ints even for an mmap
+                byte_frequency.update(memoryview(w))
+                i = 0
+                while i < len(w):
+                    current_byte = w[i]
+                    run_length = 1
+                    
+                    while i + run_length < len(w) and w[i + run_length] == current_byte:
+                        run_length += 1
+                    
+                    if run_length >= 2:
+                        run_counts[run_length if run_length < 11 else 11] += 1
+                        
+                        if run_length >= self.threshold:
+                            total_compressible_bytes += run_length
+                    
+                    i += run_length
             
-            i += run_length
+            run_analysis = {i: int(round(run_counts[i] * scale)) for i in range(2, 11)}
+            run_analysis['11+'] = int(round(run_counts[11] * scale))
+            unique_bytes = len(byte_frequency)
+            top_5 = [(b, int(round(c * scale)))
+                     for b, c in byte_frequency.most_common(5)]
         
-        byte_frequency = Counter(data)
+        total_compressible_bytes = int(round(total_compressible_bytes * scale))
         
         return {
-            'file_size': len(data),
-            'unique_bytes': len(byte_frequency),
+            'file_size': file_size,
+            'unique_bytes': unique_bytes,
             'run_distribution': run_analysis,
             'estimated_compressible_bytes': total_compressible_bytes,
-            'estimated_compression_ratio': total_compressible_bytes / len(data),
+            'estimated_compression_ratio': total_compressible_bytes / file_size,
             'top_5_bytes': [
                 {
                     'byte': f'\\x{b:02x}' if b < 32 or b > 126 else chr(b),
                     'count': c,
-                    'percentage': (c / len(data)) * 100
+                    'percentage': (c / file_size) * 100
                 }
-                for b, c in byte_frequency.most_common(5)
+                for b, c in top_5
             ],
-            'recommendation': self._get_recommendation(run_analysis, len(data))
+            'recommendation': self._get_recommendation(run_analysis, file_size)
         }
     
     def _get_recommendation(self, run_analysis: Dict, file_size: int) -> str:
@@ -391,7 +812,8 @@ class RLECompressor:
         else:
             return "RLE should provide good compression - many repetitive sequences found"
 
-def compress_file_RLE(input_path: str, output_path: str = None, threshold: int = 3) -> Dict[str, Any]:
+def compress_file_RLE(input_path: str, output_path: str = None, threshold: int = 3,
+                      return_data: bool = False) -> Dict[str, Any]:
     """
     Convenience function to compress any file using RLE
     
@@ -399,6 +821,7 @@ def compress_file_RLE(input_path: str, output_path: str = None, threshold: int =
         input_path: Path to file to compress
         output_path: Output path (optional)
         threshold: Minimum run length to compress
+        return_data: Include the serialized output bytes in the stats
     
     Returns:
         Compression statistics
@@ -407,7 +830,7 @@ def compress_file_RLE(input_path: str, output_path: str = None, threshold: int =
         output_path = input_path + '.rle'
     
     compressor = RLECompressor(threshold=threshold)
-    stats = compressor.compress(input_path, output_path)
+    stats = compressor.compress(input_path, output_path, return_data=return_data)
     compression_info = compressor.get_compression_info()
     
     return {**stats, 'compression_info': compression_info}